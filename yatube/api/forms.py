@@ -0,0 +1,30 @@
+import copy
+
+from django import forms
+
+from posts.forms import PostForm
+
+
+class BatchPostForm(forms.Form):
+    """Элемент пакетной записи: текст по правилам PostForm, группа по slug.
+
+    Группы передаются уже загруженными, чтобы проверка пакета не делала
+    по запросу на каждый элемент.
+    """
+    id = forms.IntegerField(required=False, min_value=1)
+    text = copy.deepcopy(PostForm.base_fields['text'])
+    group = forms.SlugField(required=False)
+
+    clean_text = PostForm.clean_text
+
+    def __init__(self, *args, groups, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.groups = groups
+
+    def clean_group(self):
+        slug = self.cleaned_data['group']
+        if not slug:
+            return None
+        if slug not in self.groups:
+            raise forms.ValidationError('Группа не найдена')
+        return self.groups[slug]
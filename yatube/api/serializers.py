@@ -0,0 +1,71 @@
+"""Сериализация постов, групп и профилей в JSON для /api/v1/.
+
+Записи читаются через values_list кортежами: без моделей, форм и
+промежуточных объектов. Каждый кортеж сразу превращается в словарь
+нужной формы, а весь ответ кодируется одним вызовом json.dumps.
+"""
+import json
+
+from django.core.files.storage import default_storage
+
+POST_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'image',
+    'author__username',
+    'group__slug',
+)
+GROUP_FIELDS = ('id', 'slug', 'title', 'description', 'posts_count')
+PROFILE_FIELDS = (
+    'username',
+    'first_name',
+    'last_name',
+    'post_stats__posts_count',
+    'post_stats__followers_count',
+)
+# Позиции ключа курсора в кортеже POST_FIELDS.
+ID, PUB_DATE = 0, 2
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def post_rows(queryset):
+    return queryset.values_list(*POST_FIELDS)
+
+
+def serialize_post(row):
+    pk, text, pub_date, image, author, group = row
+    return {
+        'id': pk,
+        'text': text,
+        'pub_date': pub_date.isoformat(),
+        'image': default_storage.url(image) if image else None,
+        'author': author,
+        'group': group,
+    }
+
+
+def serialize_group(row):
+    pk, slug, title, description, posts_count = row
+    return {
+        'id': pk,
+        'slug': slug,
+        'title': title,
+        'description': description,
+        'posts_count': posts_count,
+    }
+
+
+def serialize_profile(row):
+    username, first_name, last_name, posts_count, followers_count = row
+    return {
+        'username': username,
+        'full_name': f'{first_name} {last_name}'.strip(),
+        'posts_count': posts_count or 0,
+        'followers_count': followers_count or 0,
+    }
+
+
+def dumps(data):
+    return _encoder.encode(data).encode()
@@ -0,0 +1,249 @@
+import gzip
+import json
+from unittest import mock
+
+from core.jobs import run_pending
+from django.db import NotSupportedError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.views import validate_batch
+from posts.batch import save_posts
+from posts.models import (AuthorStats, Follow, Group, Post, TimelineEntry,
+                          User)
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, params=None, **kwargs):
+        response = self.client.get(reverse(f'api:{name}', kwargs=kwargs),
+                                   params or {})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, json.loads(response.content)
+
+    def test_posts_are_paged_by_cursor(self):
+        response, data = self.get('posts', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        newest = self.posts[-1]
+        self.assertEqual(data['results'][0], {
+            'id': newest.pk,
+            'text': newest.text,
+            'pub_date': newest.pub_date.isoformat(),
+            'image': None,
+            'author': 'author',
+            'group': None,
+        })
+        self.assertIsNone(data['previous'])
+        seen = [post['id'] for post in data['results']]
+        while data['next']:
+            data = json.loads(self.client.get(data['next']).content)
+            seen += [post['id'] for post in data['results']]
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+        self.assertIsNotNone(data['previous'])
+
+    def test_group_and_profile_posts(self):
+        _, data = self.get('group_posts', slug='group')
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[3].pk, self.posts[1].pk])
+        self.assertEqual(data['results'][0]['group'], 'group')
+        _, data = self.get('profile_posts', username='author')
+        self.assertEqual(len(data['results']), 5)
+
+    def test_details(self):
+        _, data = self.get('group', slug='group')
+        self.assertEqual(data['posts_count'], 2)
+        _, data = self.get('profile', username='author')
+        self.assertEqual(data, {'username': 'author',
+                                'full_name': 'Лев Толстой',
+                                'posts_count': 5,
+                                'followers_count': 0})
+        _, data = self.get('post', post_id=self.posts[0].pk)
+        self.assertEqual(data['text'], 'Пост 0')
+        _, data = self.get('groups')
+        self.assertEqual([group['slug'] for group in data['results']],
+                         ['group'])
+        self.assertIsNone(data['next'])
+
+    def test_missing_objects_return_json_404(self):
+        for name, kwargs in (('post', {'post_id': 0}),
+                             ('group', {'slug': 'missing'}),
+                             ('group_posts', {'slug': 'missing'}),
+                             ('profile', {'username': 'missing'}),
+                             ('profile_posts', {'username': 'missing'})):
+            with self.subTest(name=name):
+                response, data = self.get(name, **kwargs)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', data)
+
+    def test_read_only(self):
+        response = self.client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
+
+    @override_settings(API_GZIP_MIN_LENGTH=200)
+    def test_large_responses_are_gzipped(self):
+        url = reverse('api:posts')
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertTrue(compressed['ETag'].startswith('W/'))
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        small = self.client.get(reverse('api:group', kwargs={'slug': 'group'}),
+                                HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_unchanged_feed_is_not_modified(self):
+        response = self.client.get(reverse('api:posts'))
+        response = self.client.get(reverse('api:posts'),
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_budgets(self):
+        for name, kwargs in (('posts', {}),
+                             ('post', {'post_id': self.posts[0].pk}),
+                             ('groups', {}),
+                             ('group', {'slug': 'group'}),
+                             ('group_posts', {'slug': 'group'}),
+                             ('profile', {'username': 'author'}),
+                             ('profile_posts', {'username': 'author'})):
+            with self.subTest(name=name):
+                self.get(name, **kwargs)
+
+
+class BatchWriteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.first = Group.objects.create(
+            title='Первая', slug='first', description='Описание')
+        cls.second = Group.objects.create(
+            title='Вторая', slug='second', description='Описание')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.post = Post.objects.create(
+            text='Старый текст', author=self.author, group=self.first)
+        self.alien = Post.objects.create(text='Чужой', author=self.other)
+
+    def send(self, items, client=None):
+        response = (client or self.client).post(
+            reverse('api:posts_batch'), json.dumps({'items': items}),
+            content_type='application/json')
+        return response, json.loads(response.content)
+
+    def test_creates_and_edits_in_one_request(self):
+        response, data = self.send([
+            {'text': 'Новый 1', 'group': 'second'},
+            {'id': self.post.pk, 'text': 'Новый текст', 'group': 'second'},
+            {'text': 'Новый 2'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        statuses = [item['status'] for item in data['results']]
+        self.assertEqual(statuses, ['created', 'updated', 'created'])
+        created = Post.objects.get(pk=data['results'][0]['id'])
+        self.assertEqual((created.text, created.group, created.author),
+                         ('Новый 1', self.second, self.author))
+        self.assertEqual(Post.objects.get(pk=data['results'][2]['id']).text,
+                         'Новый 2')
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.text, self.post.group, self.post.version),
+                         ('Новый текст', self.second, 2))
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.posts_count, self.second.posts_count),
+                         (0, 2))
+        self.assertEqual(AuthorStats.objects.get(
+            author=self.author).posts_count, 3)
+
+    def test_invalid_item_rejects_whole_batch(self):
+        response, data = self.send([
+            {'text': 'Годный пост'},
+            {'text': ''},
+            {'text': 'Пост', 'group': 'missing'},
+            {'id': self.alien.pk, 'text': 'Правка'},
+            {'id': 10 ** 9, 'text': 'Правка'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        results = data['results']
+        self.assertEqual([item['status'] for item in results],
+                         ['skipped'] + ['invalid'] * 4)
+        self.assertIn('text', results[1]['errors'])
+        self.assertIn('group', results[2]['errors'])
+        self.assertIn('id', results[3]['errors'])
+        self.assertIn('id', results[4]['errors'])
+        self.assertFalse(Post.objects.filter(text='Годный пост').exists())
+
+    def test_post_deleted_after_validation_is_reported(self):
+        def validate_and_delete(user, items):
+            result = validate_batch(user, items)
+            Post.objects.filter(pk=self.post.pk).delete()
+            return result
+
+        with mock.patch('api.views.validate_batch', validate_and_delete):
+            response, data = self.send([
+                {'id': self.post.pk, 'text': 'Правка'},
+                {'text': 'Новый'},
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in data['results']],
+                         ['not_found', 'created'])
+        self.assertTrue(Post.objects.filter(text='Новый').exists())
+
+    def test_created_pks_need_sqlite_or_returned_ids(self):
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            with self.assertRaises(NotSupportedError):
+                save_posts(self.author, [Post(author=self.author,
+                                              text='Новый')])
+        self.assertFalse(Post.objects.filter(text='Новый').exists())
+
+    def test_new_posts_reach_followers(self):
+        Follow.objects.create(user=self.other, author=self.author)
+        _, data = self.send([{'text': 'Для подписчика'}])
+        run_pending()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.other, post_id=data['results'][0]['id']).exists())
+
+    @override_settings(API_BATCH_LIMIT=2)
+    def test_rejects_bad_payloads(self):
+        for items in ([], [{'text': 'a'}] * 3, 'posts', [1]):
+            with self.subTest(items=items):
+                response, _ = self.send(items)
+                self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('api:posts_batch'), 'not json',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_login(self):
+        response, _ = self.send([{'text': 'Пост'}], client=Client())
+        self.assertEqual(response.status_code, 401)
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        def queries(size):
+            items = [{'text': f'Пост {number}', 'group': 'first'}
+                     for number in range(size)]
+            with CaptureQueriesContext(connection) as captured:
+                self.send(items)
+            return len(captured)
+
+        queries(1)
+        self.assertEqual(queries(2), queries(20))
@@ -0,0 +1,258 @@
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from django.views.decorators.http import require_POST, require_safe
+
+from posts.conditional import (conditional_page, group_state, index_state,
+                               post_state, profile_state)
+from posts.batch import save_posts
+from posts.models import Group, Post, User
+from posts.views import RECORD
+from users.utils import CursorPaginator, encode_key
+from . import serializers
+from .forms import BatchPostForm
+
+MAX_LIMIT: int = 100
+
+
+class RowCursorPaginator(CursorPaginator):
+    """CursorPaginator для кортежей serializers.POST_FIELDS."""
+
+    @staticmethod
+    def encode_cursor(row):
+        return encode_key(row[serializers.PUB_DATE], row[serializers.ID])
+
+
+def json_response(data, status=200):
+    return HttpResponse(serializers.dumps(data), status=status,
+                        content_type='application/json')
+
+
+def not_found():
+    return json_response({'detail': 'Не найдено'}, status=404)
+
+
+def bad_request(detail):
+    return json_response({'detail': detail}, status=400)
+
+
+def compress_json(view):
+    """Сжимает gzip ответы длиннее API_GZIP_MIN_LENGTH байт.
+
+    Короткие ответы не сжимаются: заголовки и работа gzip съедят выигрыш.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (len(response.content) < settings.API_GZIP_MIN_LENGTH
+                or response.has_header('Content-Encoding')
+                or not re_accepts_gzip.search(
+                    request.META.get('HTTP_ACCEPT_ENCODING', ''))):
+            return response
+        response.content = compress_string(response.content)
+        response['Content-Length'] = str(len(response.content))
+        response['Content-Encoding'] = 'gzip'
+        # Сжатое представление не совпадает побайтно с исходным.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+    return wrapper
+
+
+def api_view(view):
+    return require_safe(compress_json(view))
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', RECORD))
+    except ValueError:
+        return RECORD
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def page_link(request, name, value):
+    if value is None:
+        return None
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[name] = value
+    return f'{request.path}?{params.urlencode()}'
+
+
+def posts_page(request, queryset):
+    page = RowCursorPaginator(
+        serializers.post_rows(queryset), get_limit(request)).get_cursor_page(
+        request.GET.get('after'), request.GET.get('before'))
+    return json_response({
+        'results': [serializers.serialize_post(row) for row in page],
+        'next': page_link(request, 'after', page.next_cursor),
+        'previous': page_link(request, 'before', page.previous_cursor),
+    })
+
+
+@api_view
+@conditional_page(index_state)
+def posts(request):
+    return posts_page(request, Post.objects.all())
+
+
+@api_view
+@conditional_page(post_state)
+def post(request, post_id):
+    row = serializers.post_rows(Post.objects.filter(pk=post_id)).first()
+    if row is None:
+        return not_found()
+    return json_response(serializers.serialize_post(row))
+
+
+@api_view
+def groups(request):
+    queryset = Group.objects.order_by('pk')
+    try:
+        queryset = queryset.filter(pk__gt=int(request.GET['after']))
+    except (KeyError, ValueError):
+        pass
+    limit = get_limit(request)
+    rows = list(queryset.values_list(
+        *serializers.GROUP_FIELDS)[:limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    return json_response({
+        'results': [serializers.serialize_group(row) for row in rows],
+        'next': page_link(request, 'after', rows[-1][0] if has_next else None),
+    })
+
+
+@api_view
+def group(request, slug):
+    row = Group.objects.filter(slug=slug).values_list(
+        *serializers.GROUP_FIELDS).first()
+    if row is None:
+        return not_found()
+    return json_response(serializers.serialize_group(row))
+
+
+@api_view
+@conditional_page(group_state)
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return not_found()
+    return posts_page(request, Post.objects.filter(group_id=group_id))
+
+
+@api_view
+def profile(request, username):
+    row = User.objects.filter(username=username).values_list(
+        *serializers.PROFILE_FIELDS).first()
+    if row is None:
+        return not_found()
+    return json_response(serializers.serialize_profile(row))
+
+
+@api_view
+@conditional_page(profile_state)
+def profile_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return not_found()
+    return posts_page(request, Post.objects.filter(author_id=author_id))
+
+
+def validate_batch(user, items):
+    """Проверяет элементы пакета.
+
+    Возвращает пары (cleaned_data, редактируемый пост или None) и ошибки
+    по индексам элементов. Группы и посты всех элементов читаются двумя
+    запросами.
+    """
+    slugs = {item.get('group') for item in items
+             if isinstance(item.get('group'), str)}
+    groups = Group.objects.in_bulk(slugs, field_name='slug') if slugs else {}
+    forms = [BatchPostForm(item, groups=groups) for item in items]
+    ids = [form.cleaned_data['id'] for form in forms
+           if form.is_valid() and form.cleaned_data['id']]
+    posts = Post.objects.in_bulk(ids) if ids else {}
+    valid, errors, seen = [], {}, set()
+    for index, form in enumerate(forms):
+        if not form.is_valid():
+            errors[index] = form.errors.get_json_data()
+            continue
+        pk = form.cleaned_data['id']
+        if pk is None:
+            valid.append((form.cleaned_data, None))
+            continue
+        if pk in seen:
+            message = 'Пост уже есть в пакете'
+        elif pk not in posts:
+            message = 'Пост не найден'
+        elif posts[pk].author_id != user.pk:
+            message = 'Можно править только свои посты'
+        else:
+            seen.add(pk)
+            valid.append((form.cleaned_data, posts[pk]))
+            continue
+        errors[index] = {'id': [{'message': message, 'code': 'invalid'}]}
+    return valid, errors
+
+
+@require_POST
+@compress_json
+def posts_batch(request):
+    """Создаёт и правит до API_BATCH_LIMIT постов одним запросом.
+
+    Тело - {"items": [{"text": ..., "group": slug}, {"id": ..., ...}]};
+    элемент с id - правка своего поста, без id - новый пост. Правка, как
+    в post_edit, заменяет и текст, и группу. Если хоть один элемент не
+    прошёл проверку, не пишется ничего. Пост, удалённый между проверкой
+    и записью, получает статус not_found, остальные сохраняются.
+    """
+    if not request.user.is_authenticated:
+        return json_response({'detail': 'Нужна авторизация'}, status=401)
+    try:
+        items = json.loads(request.body)['items']
+    except (ValueError, KeyError, TypeError):
+        return bad_request('Ожидается JSON вида {"items": [...]}')
+    if (not isinstance(items, list)
+            or not all(isinstance(item, dict) for item in items)):
+        return bad_request('items - список объектов')
+    if not 0 < len(items) <= settings.API_BATCH_LIMIT:
+        return bad_request(
+            f'В пакете от 1 до {settings.API_BATCH_LIMIT} элементов')
+
+    valid, errors = validate_batch(request.user, items)
+    if errors:
+        return json_response({'results': [
+            {'status': 'invalid', 'errors': errors[index]}
+            if index in errors else {'status': 'skipped'}
+            for index in range(len(items))
+        ]}, status=400)
+
+    created, updated = [], []
+    for data, post in valid:
+        if post is None:
+            created.append(Post(author=request.user, text=data['text'],
+                                group=data['group']))
+        else:
+            post.text, post.group = data['text'], data['group']
+            updated.append(post)
+    created, updated = save_posts(request.user, created, updated)
+    saved = {post.pk for post in updated}
+    created = iter(created)
+    return json_response({'results': [
+        {'status': 'created', 'id': next(created).pk} if post is None
+        else {'status': 'updated', 'id': post.pk} if post.pk in saved
+        else {'status': 'not_found', 'id': post.pk}
+        for _, post in valid
+    ]})
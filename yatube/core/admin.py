@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
+    readonly_fields = ('name', 'payload', 'key', 'attempts', 'locked_at',
+                       'last_error', 'created')
+
+
+admin.site.register(Job, JobAdmin)
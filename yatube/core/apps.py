@@ -1,5 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .checks import require_shared_cache
+        from .db import connect_signals
+
+        require_shared_cache()
+        connect_signals()
+        if getattr(settings, 'TEMPLATE_WARMUP', False):
+            from .warmup import logger, warm_templates
+
+            warmed, errors = warm_templates()
+            for name, error in errors:
+                logger.error('Шаблон %s не компилируется: %s', name, error)
+            logger.info('Скомпилировано шаблонов: %s', warmed)
@@ -0,0 +1,28 @@
+"""Проверка, что кэш по умолчанию общий для всех процессов.
+
+Сброс кэша лент и миниатюр, версии пользователей в кэше
+(users.backends) и общие ведра лимитов (core.ratelimit) работают между
+процессами только через общий кэш. С кэшем в памяти процесса каждый
+воркер видит лишь свои изменения.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    return settings.CACHES[alias]['BACKEND'] not in PER_PROCESS_BACKENDS
+
+
+def require_shared_cache():
+    """Падает при старте, если SHARED_CACHE_REQUIRED, а кэш локальный."""
+    if settings.SHARED_CACHE_REQUIRED and not cache_is_shared():
+        raise ImproperlyConfigured(
+            f"CACHES['default'] использует "
+            f"{settings.CACHES['default']['BACKEND']}: он живёт в памяти "
+            f"процесса, а профилю нужен общий кэш (memcached, база или "
+            f"файлы), см. SHARED_CACHE_REQUIRED.")
@@ -0,0 +1,34 @@
+"""Настройка соединений с БД: PRAGMA SQLite и проверка живости."""
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, которые оборвались на стороне БД.
+
+    Django переоткрывает закрытое соединение при следующем запросе, так
+    что view не получит ошибку от соединения, умершего между запросами.
+    """
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+
+def connect_signals():
+    from django.core.signals import request_started
+
+    connection_created.connect(apply_sqlite_pragmas,
+                               dispatch_uid='core.db.sqlite_pragmas')
+    request_started.connect(check_connections,
+                            dispatch_uid='core.db.check_connections')
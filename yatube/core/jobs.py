@@ -0,0 +1,139 @@
+"""Очередь отложенных задач в таблице core.Job.
+
+Задача ставится в очередь в той же транзакции, что и изменение, которое
+её породило: воркер увидит её только после коммита, а при откате она
+исчезнет вместе с данными. Воркер (manage.py run_worker) забирает
+задачу условным UPDATE, поэтому несколько воркеров не выполнят одну
+задачу дважды; упавшая задача повторяется с экспоненциальной паузой.
+Выполненные задачи хранятся JOBS_DONE_TTL секунд и удаляются воркером.
+"""
+import datetime
+import json
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger('yatube.jobs')
+
+TASKS = {}
+RETRY_DELAY: int = 2
+MAX_RETRY_DELAY: int = 3600
+
+
+def task(func=None, *, name=None, max_attempts=5):
+    """Регистрирует функцию как задачу; аргументы - только JSON-значения."""
+    def register(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+    return register if func is None else register(func)
+
+
+def enqueue(func, *, key=None, delay=0, **kwargs):
+    """Ставит вызов func(**kwargs) в очередь и возвращает задачу.
+
+    При JOBS_EAGER задача не пишется в БД, а выполняется сразу после
+    коммита текущей транзакции - как её выполнил бы воркер.
+    """
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: func(**kwargs))
+        return None
+    job = Job(
+        name=func.task_name,
+        payload=json.dumps(kwargs),
+        key=key,
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return Job.objects.get(key=key)
+    return job
+
+
+def _claimable():
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=settings.JOBS_TIMEOUT)
+    # Задачи в статусе running дольше JOBS_TIMEOUT остались от
+    # упавшего воркера, их можно забрать снова.
+    return Job.objects.filter(
+        Q(status=Job.PENDING, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale)
+    )
+
+
+def claim(limit):
+    """Забирает до limit готовых к запуску задач."""
+    claimed = []
+    candidates = _claimable().order_by('run_at', 'pk').values_list(
+        'pk', 'status', 'attempts')[:limit]
+    for pk, status, attempts in candidates:
+        updated = Job.objects.filter(
+            pk=pk, status=status, attempts=attempts,
+        ).update(status=Job.RUNNING, attempts=F('attempts') + 1,
+                 locked_at=timezone.now())
+        if updated:
+            claimed.append(Job.objects.get(pk=pk))
+    return claimed
+
+
+def execute(job):
+    """Выполняет задачу и записывает результат; True - если успешно."""
+    func = TASKS.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        func(**json.loads(job.payload))
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            logger.error('Задача %s не выполнена', job, exc_info=True)
+        else:
+            job.status = Job.PENDING
+            delay = min(RETRY_DELAY ** job.attempts, MAX_RETRY_DELAY)
+            job.run_at = timezone.now() + datetime.timedelta(seconds=delay)
+            logger.warning('Задача %s упала, повтор через %s с', job, delay)
+        job.save(update_fields=['status', 'run_at', 'last_error'])
+        return False
+    job.status = Job.DONE
+    job.save(update_fields=['status'])
+    return True
+
+
+def run_pending(limit=100):
+    """Выполняет готовые задачи до пустой очереди; возвращает их число."""
+    autodiscover_modules('tasks')
+    done = 0
+    while True:
+        jobs = claim(limit)
+        if not jobs:
+            return done
+        for job in jobs:
+            execute(job)
+            done += 1
+
+
+def prune_done():
+    """Удаляет выполненные задачи старше JOBS_DONE_TTL; возвращает их число.
+
+    Пока задача не удалена, её key не даёт поставить ту же задачу снова.
+    """
+    cutoff = timezone.now() - datetime.timedelta(
+        seconds=settings.JOBS_DONE_TTL)
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE, locked_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+
+# Как часто, в секундах, удалять старые выполненные задачи.
+PRUNE_INTERVAL: int = 60
+
+
+class Command(BaseCommand):
+    help = 'Выполняет отложенные задачи из очереди core.Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='выполнить готовые задачи и выйти')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='пауза при пустой очереди, секунды')
+        parser.add_argument('--batch', type=int, default=100,
+                            help='сколько задач забирать за раз')
+
+    def handle(self, *args, **options):
+        pruned_at = None
+        while True:
+            close_old_connections()
+            done = jobs.run_pending(options['batch'])
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if (pruned_at is None
+                    or time.monotonic() - pruned_at >= PRUNE_INTERVAL):
+                pruned = jobs.prune_done()
+                pruned_at = time.monotonic()
+                if pruned:
+                    self.stdout.write(f'Удалено выполненных задач: {pruned}')
+            if options['once']:
+                return
+            if not done:
+                try:
+                    time.sleep(options['sleep'])
+                except KeyboardInterrupt:
+                    return
@@ -0,0 +1,160 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.http import HttpResponse
+
+from . import ratelimit
+from .checks import cache_is_shared
+
+logger = logging.getLogger('yatube.performance')
+ratelimit_logger = logging.getLogger('yatube.ratelimit')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """View сделала больше SQL-запросов, чем ей разрешено."""
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+def current_metrics():
+    """Метрики запроса, который сейчас обрабатывается, или None."""
+    return _current.get()
+
+
+class RequestMetricsMiddleware:
+    """Считает запросы к БД, время SQL и шаблонов для каждого view.
+
+    Результат уходит в заголовок Server-Timing и в лог yatube.performance.
+    Время шаблонов досчитывает бэкенд core.template_backends.
+    Если view превысила бюджет запросов из QUERY_BUDGETS, пишется
+    предупреждение, а при QUERY_BUDGET_STRICT выбрасывается исключение,
+    чтобы тест упал.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else None
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.sql_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries"',
+            f'tpl;dur={metrics.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        record = {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'bytes': size,
+        }
+        if response.status_code == 429 and logger.isEnabledFor(logging.INFO):
+            record['rate_limit_rejections'] = ratelimit.rejections(
+                [view])[view]
+        logger.info(json.dumps(record))
+        self.check_budget(view, metrics.queries)
+        return response
+
+    def check_budget(self, view, queries):
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is None or queries <= budget:
+            return
+        message = f'{view}: {queries} SQL-запросов при бюджете {budget}'
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту POST-запросов к view из RATE_LIMITS.
+
+    Лимит считается на пользователя (scope 'user', для анонимов - на
+    адрес) или на адрес (scope 'ip'). Отказ - ответ 429 до вызова view:
+    ни ORM, ни хешер паролей не работают. Каждый отказ пишется строкой
+    JSON в лог yatube.ratelimit и считается в кэше (ratelimit.rejections),
+    а счётчик view попадает в строку метрик запроса.
+
+    Общее ведро живёт в CACHES['default']; с кэшем в памяти процесса
+    каждый процесс считал бы свой лимит, поэтому вне DEBUG такой кэш
+    при включённых лимитах не принимается.
+    """
+
+    def __init__(self, get_response):
+        if (settings.RATE_LIMITS and not settings.DEBUG
+                and not cache_is_shared()):
+            raise ImproperlyConfigured(
+                'RATE_LIMITS требуют общего для процессов кэша: '
+                f"{settings.CACHES['default']['BACKEND']} у каждого "
+                'процесса свой.')
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        view = request.resolver_match.view_name
+        rule = settings.RATE_LIMITS.get(view)
+        if rule is None:
+            return None
+        client = request.META.get(settings.RATE_LIMIT_IP_HEADER, '')
+        if rule['scope'] == 'user' and request.user.is_authenticated:
+            client = f'user:{request.user.pk}'
+        rejected = ratelimit.check(
+            f'{view}:{client}', rule['burst'], rule['per_minute'])
+        if rejected is None:
+            return None
+        stage, retry_after = rejected
+        ratelimit.count_rejection(view, stage)
+        ratelimit_logger.warning(json.dumps({
+            'view': view,
+            'scope': rule['scope'],
+            'stage': stage,
+            'client': client,
+            'retry_after': retry_after,
+        }))
+        response = HttpResponse('Слишком много запросов, попробуйте позже',
+                                status=429,
+                                content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(retry_after)
+        return response
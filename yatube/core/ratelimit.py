@@ -0,0 +1,122 @@
+"""Ограничение частоты запросов: ведро токенов в кэше и в процессе.
+
+Общий для всех процессов счёт живёт в кэше CACHES['default'] и
+меняется только через incr. Общим он будет, только если общий сам кэш:
+memcached (там incr атомарен), база или файлы. С LocMemCache у каждого
+процесса свой лимит, поэтому RateLimitMiddleware вне DEBUG его не
+принимает. Ведро ёмкостью burst наполняется со
+скоростью per_minute токенов в минуту; в кэше оно приближено скользящим
+окном длиной в полное наполнение ведра: текущее окно плюс доля
+прошлого.
+
+Перед кэшем стоит точное ведро в памяти процесса. Клиент, который
+исчерпал лимит уже в одном процессе, получает отказ без обращения к
+кэшу, и после отказа кэша процесс тоже помнит о нём до пополнения.
+
+Отказы считаются в том же кэше: rejections() отдаёт их число по view и
+этапу (local - отказал процесс, cache - общее ведро).
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+LOCAL_BUCKETS_SIZE: int = 10000
+STAGES = ('local', 'cache')
+
+
+class LocalBuckets:
+    """Ведра токенов в памяти процесса с вытеснением давно не нужных."""
+
+    def __init__(self, size=LOCAL_BUCKETS_SIZE):
+        self.size = size
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate, now=None):
+        """Забирает токен; False - если ведро пусто."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.size:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def drain(self, key, now=None):
+        """Опустошает ведро: общий лимит уже исчерпан."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._buckets.pop(key, None)
+            self._buckets[key] = (0, now)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+local_buckets = LocalBuckets()
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def take_shared(key, burst, rate, now=None):
+    """Забирает токен из общего ведра в кэше.
+
+    Возвращает None, если токен есть, иначе - через сколько секунд
+    стоит повторить.
+    """
+    now = time.time() if now is None else now
+    period = burst / rate
+    window, offset = divmod(now, period)
+    current = f'ratelimit:{key}:{int(window)}'
+    previous = f'ratelimit:{key}:{int(window) - 1}'
+    used = _incr(current, math.ceil(period * 2))
+    used += cache.get(previous, 0) * (1 - offset / period)
+    if used <= burst:
+        return None
+    return math.ceil(period - offset)
+
+
+def check(key, burst, per_minute):
+    """Проверяет лимит для key; None - можно, иначе (этап, Retry-After)."""
+    rate = per_minute / 60
+    if not local_buckets.take(key, burst, rate):
+        return 'local', math.ceil(1 / rate)
+    retry_after = take_shared(key, burst, rate)
+    if retry_after is None:
+        return None
+    local_buckets.drain(key)
+    return 'cache', retry_after
+
+
+def _rejections_key(view, stage):
+    return f'ratelimit:rejected:{view}:{stage}'
+
+
+def count_rejection(view, stage):
+    _incr(_rejections_key(view, stage), None)
+
+
+def rejections(views):
+    """Число отказов по view и этапу с последней очистки кэша."""
+    keys = {(view, stage): _rejections_key(view, stage)
+            for view in views for stage in STAGES}
+    counts = cache.get_many(keys.values())
+    return {
+        view: {stage: counts.get(keys[view, stage], 0) for stage in STAGES}
+        for view in views
+    }
@@ -0,0 +1,77 @@
+"""Хранилище статики: имена с хешем содержимого и сжатые копии файлов."""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.txt', '.xml',
+                '.map', '.html')
+# Файлы меньше этого не сжимаем: заголовки съедят выигрыш.
+MIN_SIZE: int = 256
+
+
+def gzip_bytes(content):
+    # mtime=0 - одинаковый результат при каждом collectstatic.
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(content):
+    return brotli.compress(content, quality=11)
+
+
+# Кодировки в порядке предпочтения при выдаче.
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+COMPRESSORS = {'gzip': gzip_bytes}
+if brotli is not None:
+    COMPRESSORS['br'] = brotli_bytes
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который после collectstatic кладёт рядом
+    с каждым текстовым файлом .gz и, если установлен brotli, .br.
+
+    Сжатая копия сохраняется, только если она меньше оригинала.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        if not name.lower().endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < MIN_SIZE:
+            return
+        for encoding, compress in COMPRESSORS.items():
+            data = compress(content)
+            if len(data) >= len(content):
+                continue
+            compressed = name + SUFFIXES[encoding]
+            if self.exists(compressed):
+                self.delete(compressed)
+            self._save(compressed, ContentFile(data))
+            yield compressed
+
+
+def compressed_variant(path, accept_encoding):
+    """Путь к сжатой копии файла, подходящей клиенту, и её кодировка."""
+    accepted = {
+        token.split(';')[0].strip().lower()
+        for token in accept_encoding.split(',')
+    }
+    for encoding, suffix in SUFFIXES.items():
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
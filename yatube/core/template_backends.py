@@ -0,0 +1,33 @@
+"""Бэкенд шаблонов Django, который меряет время рендеринга.
+
+Меряются только шаблоны верхнего уровня, полученные через бэкенд:
+вложенные include рендерятся внутри них, и их время уже учтено.
+Время прибавляется к метрикам текущего запроса RequestMetricsMiddleware.
+"""
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .middleware import current_metrics
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = current_metrics()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        template = super().from_string(template_code)
+        return TimedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,303 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.template import engines
+from django.templatetags.static import static
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from core import checks, jobs, ratelimit, storage, views
+from core.middleware import RateLimitMiddleware
+from core.models import Job
+from core.views import serve_static
+from yatube.settings import prod
+
+calls = []
+
+
+@jobs.task(max_attempts=2)
+def remember(value):
+    calls.append(value)
+
+
+@jobs.task(max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_runs_pending_jobs(self):
+        jobs.enqueue(remember, value=1)
+        jobs.enqueue(remember, value=2, delay=60)
+        out = StringIO()
+        call_command('run_worker', once=True, stdout=out)
+        self.assertEqual(calls, [1])
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertEqual(
+            Job.objects.filter(status=Job.PENDING).count(), 1)
+
+    def test_idempotency_key(self):
+        first = jobs.enqueue(remember, key='once', value=1)
+        second = jobs.enqueue(remember, key='once', value=2)
+        self.assertEqual(first.pk, second.pk)
+        jobs.run_pending()
+        jobs.enqueue(remember, key='once', value=3)
+        jobs.run_pending()
+        self.assertEqual(calls, [1])
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job = jobs.enqueue(explode)
+        with self.assertLogs('yatube.jobs', 'WARNING'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertIn('RuntimeError', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('yatube.jobs', 'ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = jobs.enqueue(remember, value=1)
+        claimed, = jobs.claim(10)
+        self.assertEqual(claimed.status, Job.RUNNING)
+        self.assertEqual(jobs.claim(10), [])
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_worker_prunes_old_done_jobs(self):
+        old = jobs.enqueue(remember, value=1)
+        fresh = jobs.enqueue(remember, value=2)
+        jobs.run_pending()
+        long_ago = timezone.now() - datetime.timedelta(days=2)
+        failed = Job.objects.create(name='explode', status=Job.FAILED,
+                                    run_at=long_ago, locked_at=long_ago)
+        Job.objects.filter(pk=old.pk).update(locked_at=long_ago)
+        out = StringIO()
+        call_command('run_worker', once=True, stdout=out)
+        self.assertIn('Удалено выполненных задач: 1', out.getvalue())
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)),
+                         {fresh.pk, failed.pk})
+
+    def test_eager_mode_skips_the_table(self):
+        with self.settings(JOBS_EAGER=True):
+            self.assertIsNone(jobs.enqueue(remember, value=1))
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(TEMPLATES=prod.TEMPLATES)
+class TemplateWarmupTest(TestCase):
+    def test_command_compiles_project_templates_into_cache(self):
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn('Скомпилировано шаблонов', out.getvalue())
+        loader, = engines['django'].engine.template_loaders
+        for name in ('base.html', 'includes/header.html',
+                     'posts/index.html', 'posts/includes/paginator.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, loader.get_template_cache)
+
+
+@override_settings(SHARED_CACHE_REQUIRED=True)
+class SharedCacheTest(SimpleTestCase):
+    def test_per_process_cache_is_rejected(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'LocMemCache'):
+            checks.require_shared_cache()
+
+    @override_settings(CACHES=prod.CACHES)
+    def test_prod_cache_is_shared(self):
+        self.assertTrue(checks.cache_is_shared())
+        checks.require_shared_cache()
+
+
+class SQLitePragmasTest(SimpleTestCase):
+    def test_new_sqlite_connection_gets_pragmas(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper(
+                {**connection.settings_dict,
+                 'NAME': os.path.join(directory, 'pragmas.sqlite3')},
+                alias='pragmas')
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for name in ('journal_mode', 'synchronous', 'mmap_size',
+                                 'busy_timeout'):
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': 5000,
+        })
+
+
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'),
+        )
+        cls.settings_override.enable()
+        # Статика админки не нужна тесту, а её сжатие занимает секунды.
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     ignore_patterns=['admin'])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, url, encoding=''):
+        request = RequestFactory().get(url, HTTP_ACCEPT_ENCODING=encoding)
+        return serve_static(request, url[len('/static/'):])
+
+    def test_hashed_names_and_precompressed_copies(self):
+        url = static('css/bootstrap.min.css')
+        self.assertRegex(url, r'^/static/css/bootstrap\.min\.[0-9a-f]{12}'
+                              r'\.css$')
+        path = os.path.join(self.root, url[len('/static/'):])
+        self.assertTrue(os.path.isfile(path + '.gz'))
+        self.assertLess(os.path.getsize(path + '.gz'), os.path.getsize(path))
+        self.assertFalse(os.path.exists(os.path.join(
+            self.root, static('img/logo.png')[len('/static/'):] + '.gz')))
+
+    def test_serving_picks_encoding_and_sets_immutable(self):
+        url = static('css/bootstrap.min.css')
+        response = self.get(url, 'gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], views.IMMUTABLE)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        response.close()
+        response = self.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response.close()
+        response = self.get('/static/css/bootstrap.min.css', 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=0')
+        response.close()
+
+    @skipUnless(storage.brotli, 'brotli не установлен')
+    def test_brotli_is_preferred(self):
+        response = self.get(static('css/bootstrap.min.css'), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        response.close()
+
+
+LOGIN_LIMIT = {'users:login': {'scope': 'ip', 'burst': 2, 'per_minute': 1}}
+CREATE_LIMIT = {
+    'posts:post_create': {'scope': 'user', 'burst': 1, 'per_minute': 1}}
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_ratelimit'),
+}})
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        ratelimit.local_buckets.clear()
+        self.client = Client()
+
+    def login(self):
+        return self.client.post(reverse('users:login'),
+                                {'username': 'bot', 'password': 'secret'})
+
+    def test_local_bucket_refills(self):
+        buckets = ratelimit.LocalBuckets(size=2)
+        self.assertTrue(buckets.take('a', 2, 1, now=0))
+        self.assertTrue(buckets.take('a', 2, 1, now=0))
+        self.assertFalse(buckets.take('a', 2, 1, now=0.5))
+        self.assertTrue(buckets.take('a', 2, 1, now=1.5))
+        buckets.take('b', 2, 1, now=2)
+        buckets.take('c', 2, 1, now=2)
+        self.assertEqual(list(buckets._buckets), ['b', 'c'])
+
+    def test_shared_bucket_uses_sliding_window(self):
+        for _ in range(3):
+            self.assertIsNone(ratelimit.take_shared('k', 3, 1, now=301))
+        self.assertEqual(ratelimit.take_shared('k', 3, 1, now=301), 2)
+        # Следующее окно: прошлое учитывается долей, пока не истечёт.
+        self.assertEqual(ratelimit.take_shared('k', 3, 1, now=303), 3)
+        self.assertIsNone(ratelimit.take_shared('k', 3, 1, now=305.9))
+
+    @override_settings(RATE_LIMITS=LOGIN_LIMIT)
+    def test_login_burst_is_rejected_before_the_view(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login().status_code, 200)
+        with self.assertLogs('yatube.ratelimit', 'WARNING') as logs:
+            with self.assertNumQueries(0):
+                response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertIn('"stage": "local"', logs.output[0])
+        self.assertEqual(ratelimit.rejections(['users:login']),
+                         {'users:login': {'local': 1, 'cache': 0}})
+        self.assertEqual(self.client.get(
+            reverse('users:login')).status_code, 200)
+
+    @override_settings(RATE_LIMITS=LOGIN_LIMIT)
+    def test_limit_is_shared_between_processes(self):
+        self.login()
+        self.login()
+        # Другой процесс: своё ведро в памяти полное, общее - в файлах
+        # кэша, которые процессы читают одинаково.
+        ratelimit.local_buckets.clear()
+        with self.assertLogs('yatube.ratelimit', 'WARNING') as logs:
+            self.assertEqual(self.login().status_code, 429)
+        self.assertIn('"stage": "cache"', logs.output[0])
+        with self.assertLogs('yatube.ratelimit', 'WARNING') as logs:
+            self.assertEqual(self.login().status_code, 429)
+        self.assertIn('"stage": "local"', logs.output[0])
+        with self.assertLogs('yatube.performance', 'INFO') as logs:
+            self.login()
+        self.assertIn('"rate_limit_rejections": {"local": 2, "cache": 1}',
+                      logs.output[-1])
+
+    @override_settings(RATE_LIMITS=LOGIN_LIMIT, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            RateLimitMiddleware(lambda request: None)
+        with self.settings(DEBUG=True):
+            RateLimitMiddleware(lambda request: None)
+
+    @override_settings(RATE_LIMITS=CREATE_LIMIT)
+    def test_user_scope_counts_each_user(self):
+        User = get_user_model()
+        for username in ('first', 'second'):
+            self.client.force_login(User.objects.create_user(username))
+            url = reverse('posts:post_create')
+            self.assertEqual(self.client.post(
+                url, {'text': 'Пост'}).status_code, 302)
+            with self.assertLogs('yatube.ratelimit', 'WARNING'):
+                self.assertEqual(self.client.post(
+                    url, {'text': 'Пост'}).status_code, 429)
@@ -0,0 +1,50 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .storage import compressed_variant
+
+# Имя файла с хешем содержимого от ManifestStaticFilesStorage:
+# logo.0123456789ab.png.
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def serve_static(request, path):
+    """Отдаёт файл из STATIC_ROOT, по возможности уже сжатым.
+
+    Файлы с хешем в имени никогда не меняются, поэтому кэшируются
+    браузером на год без перепроверки; остальные - с проверкой
+    If-Modified-Since.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404('Файл не найден')
+    if not os.path.isfile(fullpath):
+        raise Http404('Файл не найден')
+    served, encoding = compressed_variant(
+        fullpath, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    stat = os.stat(served)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response = FileResponse(
+        open(served, 'rb'),
+        content_type=content_type or 'application/octet-stream')
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Cache-Control'] = (
+        IMMUTABLE if HASHED_NAME.search(path) else 'public, max-age=0')
+    return response
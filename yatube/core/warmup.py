@@ -0,0 +1,38 @@
+"""Предварительная компиляция шаблонов проекта."""
+import logging
+import os
+
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger('yatube.performance')
+
+
+def template_names(directory):
+    """Имена всех шаблонов каталога относительно него самого."""
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(('.html', '.txt')):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_templates():
+    """Компилирует шаблоны из DIRS каждого движка Django.
+
+    С cached.Loader скомпилированные шаблоны остаются в памяти процесса.
+    Возвращает пару (число шаблонов, список (имя, исключение) с ошибками).
+    """
+    warmed, errors = 0, []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.engine.dirs:
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except Exception as error:
+                    errors.append((name, error))
+                else:
+                    warmed += 1
+    return warmed, errors
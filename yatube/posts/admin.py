@@ -1,5 +1,45 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.forms import BaseModelFormSet
+
+from users.utils import EstimatedCountPaginator
 from .models import Post, Group
+from .search import match_queryset
+
+
+class LoadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, которому можно передать выбранный объект.
+
+    Обычный виджет достаёт подпись выбранного значения отдельным
+    запросом, и в list_editable это запрос на каждую строку.
+    """
+    selected = None
+
+    def optgroups(self, name, value, attr=None):
+        values = [str(v) for v in value
+                  if str(v) not in self.choices.field.empty_values]
+        if self.selected is None or values != [str(self.selected.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, self.selected.pk,
+            self.choices.field.label_from_instance(self.selected),
+            True, len(options)))
+        return [(None, options, 0)]
+
+
+class LoadedAutocompleteFormSet(BaseModelFormSet):
+    """Отдаёт виджетам связанные объекты, уже загруженные select_related."""
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        for name, field in form.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, LoadedAutocompleteSelect):
+                widget.selected = getattr(form.instance, name)
+        return form
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -11,11 +51,39 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    ordering = ('-pub_date', '-pk')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', LoadedAutocompleteFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault('widget', LoadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using')))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу вместо LIKE '%...%' по text.
+        if not search_term.strip():
+            return queryset, False
+        return match_queryset(queryset, search_term), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'posts_count')
+    search_fields = ('title', 'slug')
+
 
 admin.site.register(Post, PostAdmin)
 
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
@@ -0,0 +1,94 @@
+"""Запись пачки новых и изменённых постов одной транзакцией.
+
+bulk_create и bulk_update не шлют сигналов, поэтому то, что для
+одиночного save делают ресиверы posts.signals, здесь делается пачкой:
+счётчики групп, версия и время изменения, сброс кэша лент после
+коммита и раздача новых постов по лентам подписчиков в воркере.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.jobs import enqueue
+from . import tasks
+from .models import Group, Post
+from .page_cache import purge_feed_pages
+from .signals import shift_group_counter
+
+UPDATE_FIELDS = ('text', 'group', 'modified', 'version')
+
+
+def _fill_pks(author, posts):
+    """Проставляет id созданным постам, если база их не вернула.
+
+    Django 2.2 получает id из bulk_create только в PostgreSQL. В SQLite
+    транзакция, начавшая запись, держит блокировку всей базы: параллельных
+    вставок нет, и наши посты - последние у автора. В других базах
+    (MySQL) такой гарантии нет, и id пришлось бы угадывать - там пачка
+    новых постов не поддерживается.
+    """
+    if not posts or posts[0].pk is not None:
+        return
+    if connection.vendor != 'sqlite':
+        raise NotSupportedError(
+            'Пачка новых постов поддерживается только в PostgreSQL и SQLite')
+    pks = Post.objects.filter(
+        author=author, pub_date__gte=posts[0].pub_date).order_by(
+        '-pk').values_list('pk', flat=True)[:len(posts)]
+    for post, pk in zip(posts, reversed(list(pks))):
+        post.pk = pk
+
+
+def save_posts(author, created=(), updated=()):
+    """Создаёт посты created и сохраняет правки updated автора author.
+
+    Возвращает пару списков (created, updated) с проставленными id и
+    версиями. Все посты должны принадлежать author. Посты, удалённые
+    после проверки, в updated не попадают.
+    """
+    created, updated = list(created), list(updated)
+    group_ids = set()
+    with transaction.atomic():
+        if updated:
+            now = timezone.now()
+            # Строки блокируются до конца транзакции: пост, удалённый уже
+            # после этого чтения, не потеряется между ним и bulk_update.
+            previous = dict(Post.objects.select_for_update().filter(
+                pk__in=[post.pk for post in updated]).values_list(
+                'pk', 'group_id'))
+            updated = [post for post in updated if post.pk in previous]
+            deltas = Counter()
+            for post in updated:
+                group_id = previous[post.pk]
+                post.modified = now
+                # Версия поднимается в самом UPDATE, как у одиночного save.
+                post.version = F('version') + 1
+                if group_id != post.group_id:
+                    deltas[group_id] -= 1
+                    deltas[post.group_id] += 1
+                group_ids |= {group_id, post.group_id}
+            Post.objects.bulk_update(updated, UPDATE_FIELDS)
+            versions = dict(Post.objects.filter(pk__in=previous).values_list(
+                'pk', 'version'))
+            for post in updated:
+                post.version = versions[post.pk]
+            for group_id, delta in deltas.items():
+                if group_id is not None and delta:
+                    shift_group_counter(group_id, delta)
+        if created:
+            created = Post.objects.bulk_create(created)
+            _fill_pks(author, created)
+            group_ids |= {post.group_id for post in created}
+            enqueue(tasks.fan_out_posts,
+                    post_ids=[post.pk for post in created])
+        group_ids.discard(None)
+        if settings.FEED_PAGE_CACHE_TIMEOUT and (created or updated):
+            slugs = list(Group.objects.filter(pk__in=group_ids).values_list(
+                'slug', flat=True)) if group_ids else []
+            usernames = [author.username]
+            transaction.on_commit(lambda: purge_feed_pages(
+                usernames=usernames, group_slugs=slugs))
+    return created, updated
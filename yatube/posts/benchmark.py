@@ -0,0 +1,173 @@
+"""Воспроизводимый замер производительности views приложения posts.
+
+seed() заполняет базу заданным объёмом данных пачками bulk_create,
+run() прогоняет views через тестовый клиент и возвращает p50/p95 задержки
+и число SQL-запросов, compare() сравнивает прогон с сохранённым ранее.
+Случайность задаётся seed, поэтому два прогона с одинаковыми параметрами
+ходят по одним и тем же страницам.
+"""
+import datetime
+import math
+import statistics
+import time
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from users.utils import encode_key
+from .directory import GROUPS_PER_PAGE
+from .models import Group, Post, User, preserve_post_dates
+
+BATCH_SIZE: int = 5000
+SIZES = {
+    'small': {'posts': 10_000, 'users': 1_000, 'groups': 100},
+    'medium': {'posts': 100_000, 'users': 5_000, 'groups': 1_000},
+    'large': {'posts': 1_000_000, 'users': 20_000, 'groups': 5_000},
+}
+VIEWS = ('index', 'api_index', 'group_index', 'group_posts', 'profile',
+         'post_detail', 'post_create', 'post_edit')
+
+
+def seed(posts, users, groups, rng, stdout=None):
+    """Заполняет базу пользователями, группами и постами."""
+    password = make_password(None)
+    for start in range(0, users, BATCH_SIZE):
+        User.objects.bulk_create(
+            User(username=f'bench_user_{i}', first_name='Имя',
+                 last_name=f'Фамилия {i}', password=password)
+            for i in range(start, min(start + BATCH_SIZE, users))
+        )
+    # Размер пачки выбирает Django: SQLite не принимает больше 500
+    # строк в одном INSERT ... SELECT.
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'bench-group-{i}',
+              description='Описание группы') for i in range(groups))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    group_ids = list(Group.objects.values_list('id', flat=True)) + [None]
+    started = timezone.now() - datetime.timedelta(days=365)
+    step = datetime.timedelta(days=365) / max(posts, 1)
+    with preserve_post_dates():
+        for start in range(0, posts, BATCH_SIZE):
+            batch = []
+            for i in range(start, min(start + BATCH_SIZE, posts)):
+                pub_date = started + step * i
+                batch.append(Post(
+                    text=f'Тестовый пост {i} ' * rng.randint(1, 20),
+                    author_id=rng.choice(user_ids),
+                    group_id=rng.choice(group_ids),
+                    pub_date=pub_date,
+                    modified=pub_date,
+                ))
+            Post.objects.bulk_create(batch, update_counters=False)
+            if stdout is not None:
+                stdout.write(f'Создано постов: {start + len(batch)}')
+    call_command('recount_posts', stdout=stdout or StringIO())
+
+
+def percentile(values, fraction):
+    """Процентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class Runner:
+    def __init__(self, rng, iterations):
+        self.rng = rng
+        self.iterations = iterations
+        # Браузер и мобильный клиент API одинаково принимают gzip.
+        self.anonymous = Client(HTTP_ACCEPT_ENCODING='gzip')
+        self.author = User.objects.filter(
+            get_posts__isnull=False).order_by('pk').first()
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.group_slugs = list(Group.objects.filter(
+            posts_count__gt=0).values_list('slug', flat=True)[:1000])
+        self.usernames = list(User.objects.filter(
+            post_stats__posts_count__gt=0).values_list(
+            'username', flat=True)[:1000])
+        self.post_ids = list(Post.objects.values_list('id', flat=True)[:1000])
+        self.own_post_ids = list(self.author.get_posts.values_list(
+            'id', flat=True)[:100])
+        self.group_pages = max(Group.objects.count() // GROUPS_PER_PAGE, 1)
+        self.cursors = [encode_key(pub_date, pk) for pk, pub_date in
+                        Post.objects.values_list('id', 'pub_date')[:1000]]
+
+    def request(self, view):
+        rng = self.rng
+        # HTML- и API-ленты листаются одними и теми же курсорами: замер
+        # сравнивает форматы, а не OFFSET с курсором.
+        if view in ('index', 'api_index'):
+            name = 'posts:index' if view == 'index' else 'api:posts'
+            return self.anonymous.get, reverse(name), {
+                'after': rng.choice(self.cursors)}
+        if view == 'group_index':
+            return self.anonymous.get, reverse('posts:group_index'), {
+                'page': rng.randint(1, self.group_pages)}
+        if view == 'group_posts':
+            return self.anonymous.get, reverse('posts:group_posts', kwargs={
+                'slug': rng.choice(self.group_slugs)}), {}
+        if view == 'profile':
+            return self.anonymous.get, reverse('posts:profile', kwargs={
+                'username': rng.choice(self.usernames)}), {}
+        if view == 'post_detail':
+            return self.anonymous.get, reverse('posts:post_detail', kwargs={
+                'post_id': rng.choice(self.post_ids)}), {}
+        if view == 'post_create':
+            return self.client.post, reverse('posts:post_create'), {
+                'text': f'Пост из замера {rng.random()}'}
+        return self.client.post, reverse('posts:post_edit', kwargs={
+            'post_id': rng.choice(self.own_post_ids)}), {
+            'text': f'Правка из замера {rng.random()}'}
+
+    def measure(self, view):
+        timings, queries = [], []
+        for _ in range(self.iterations):
+            method, url, data = self.request(view)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = method(url, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{view}: {url} -> {response.status_code}')
+            queries.append(len(captured))
+        return {
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'rps': round(1000 / statistics.mean(timings), 1),
+            'queries': max(queries),
+        }
+
+
+def run(rng, iterations, views=VIEWS):
+    cache.clear()
+    runner = Runner(rng, iterations)
+    # Замер шлёт сотни POST от одного пользователя подряд: лимиты
+    # частоты отказали бы ему на первом десятке.
+    with override_settings(RATE_LIMITS={}):
+        return {view: runner.measure(view) for view in views}
+
+
+def compare(results, baseline, threshold):
+    """Список регрессий: p95 или число запросов выросли сверх порога."""
+    regressions = []
+    for view, current in results.items():
+        previous = baseline.get(view)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{view}: p95 {previous["p95_ms"]} -> {current["p95_ms"]} мс')
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{view}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}')
+    return regressions
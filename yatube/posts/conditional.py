@@ -0,0 +1,114 @@
+"""Валидаторы условных GET-запросов (ETag и Last-Modified) для постов.
+
+Валидатор считается одним небольшим запросом по индексу, до того как
+view начнёт собирать страницу, поэтому ответ 304 почти ничего не стоит.
+"""
+import hashlib
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import FeedChange, Group, Post, User
+
+
+def feeds_changed():
+    """Подзапрос: время последнего удаления из FeedChange или NULL.
+
+    Удалённый пост и группа, удалённая через SET_NULL, не оставляют
+    строки с новым modified. Время хранится в базе, а не в кэше, и
+    читается тем же запросом, что и остальной валидатор.
+    """
+    return Subquery(FeedChange.objects.filter(
+        pk=FeedChange.SINGLETON).values('changed')[:1])
+
+
+def touch_feeds():
+    """Сдвигает время удаления в текущей транзакции."""
+    now = timezone.now()
+    if not FeedChange.objects.filter(pk=FeedChange.SINGLETON).update(
+            changed=now):
+        FeedChange.objects.update_or_create(
+            pk=FeedChange.SINGLETON, defaults={'changed': now})
+
+
+def _latest(last, changed):
+    if last is None or changed is None:
+        return last
+    return max(last, changed)
+
+
+def _last_modified_of(posts):
+    return Subquery(posts.order_by('-modified').values('modified')[:1])
+
+
+def index_state(request):
+    state = Post.objects.order_by('-modified').annotate(
+        changed=feeds_changed()).values_list('modified', 'changed').first()
+    if state is None:
+        return None
+    return _latest(*state), None
+
+
+def group_state(request, slug):
+    posts = Post.objects.filter(group=OuterRef('pk'))
+    state = Group.objects.filter(slug=slug).annotate(
+        last=_last_modified_of(posts), changed=feeds_changed()).values_list(
+        'last', 'changed', 'posts_count').first()
+    if state is None:
+        return None
+    last, changed, posts_count = state
+    return _latest(last, changed), posts_count
+
+
+def profile_state(request, username):
+    posts = Post.objects.filter(author=OuterRef('pk'))
+    state = User.objects.filter(username=username).annotate(
+        last=_last_modified_of(posts), changed=feeds_changed()).values_list(
+        'last', 'changed', 'post_stats__posts_count',
+        'post_stats__followers_count').first()
+    if state is None:
+        return None
+    # Число подписчиков меняется при подписке: кнопка на странице
+    # должна переключиться, даже если посты не менялись.
+    last, changed, posts_count, followers_count = state
+    return _latest(last, changed), f'{posts_count}:{followers_count}'
+
+
+def post_state(request, post_id):
+    state = Post.objects.filter(pk=post_id).annotate(
+        changed=feeds_changed()).values_list(
+        'modified', 'changed', 'author__post_stats__posts_count').first()
+    if state is None:
+        return None
+    last, changed, posts_count = state
+    return _latest(last, changed), posts_count
+
+
+def conditional_page(get_state):
+    """Декоратор view: отвечает 304, если у клиента актуальная версия.
+
+    get_state возвращает пару (время последнего изменения, доп. признак);
+    признак - например, счётчик постов. Время не бывает раньше
+    последнего удаления (feeds_changed), поэтому удаления меняют и ETag,
+    и Last-Modified.
+    В ETag входит пользователь: шапка страницы у каждого своя.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = get_state(
+                request, *args, **kwargs)
+        return request._conditional_state or (None, None)
+
+    def etag(request, *args, **kwargs):
+        last_modified, extra = state(request, *args, **kwargs)
+        if last_modified is None:
+            return None
+        user = request.user.pk if request.user.is_authenticated else 0
+        raw = f'{last_modified.isoformat()}:{extra}:{user}'
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        return state(request, *args, **kwargs)[0]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,65 @@
+"""Каталог групп: число постов и время последней публикации.
+
+Страница каталога - один запрос: posts_count - уже готовый счётчик
+группы, а время последнего поста берётся подзапросом, который для
+каждой группы страницы делает один шаг по индексу (group, -pub_date).
+Строки страницы и общее число групп кэшируются под поколением
+каталога; поколение сбрасывается после коммита, когда меняется состав
+групп или постов в них.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import Group, Post
+
+GROUPS_PER_PAGE: int = 50
+GENERATION_KEY = 'groups:directory:generation'
+DIRECTORY_FIELDS = ('slug', 'title', 'description', 'posts_count',
+                    'last_activity')
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = uuid4().hex
+        if not cache.add(GENERATION_KEY, generation, None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def purge_group_directory():
+    """Сбрасывает кэш каталога после коммита текущей транзакции."""
+    transaction.on_commit(lambda: cache.delete(GENERATION_KEY))
+
+
+def directory_queryset():
+    last_post = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date').values('pub_date')[:1]
+    return Group.objects.annotate(
+        last_activity=Subquery(last_post)).order_by(
+        'title', 'pk').values(*DIRECTORY_FIELDS)
+
+
+def get_page(number):
+    """Страница каталога с номером number, как Paginator.get_page."""
+    timeout = settings.GROUP_DIRECTORY_CACHE_TIMEOUT
+    prefix = f'groups:directory:{_generation()}'
+    paginator = Paginator(directory_queryset(), GROUPS_PER_PAGE)
+    count = cache.get(f'{prefix}:count')
+    if count is None:
+        count = paginator.count
+        cache.set(f'{prefix}:count', count, timeout)
+    paginator.count = count
+    page = paginator.get_page(number)
+    key = f'{prefix}:page:{page.number}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(page.object_list)
+        cache.set(key, rows, timeout)
+    page.object_list = rows
+    return page
@@ -0,0 +1,94 @@
+"""Потоковая выгрузка постов в JSON Lines и CSV.
+
+Таблица обходится пачками по ключу id с LIMIT, каждая пачка читается
+через iterator(), а строки отдаются по мере чтения. Поэтому память не
+зависит от объёма выгрузки.
+"""
+import csv
+import datetime
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Post
+
+CHUNK_SIZE: int = 2000
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+EXPORT_FIELDS = ('id', 'text', 'pub_date', 'author__username', 'group__slug')
+HEADER = ('id', 'text', 'pub_date', 'author', 'group')
+
+
+def parse_moment(value, end_of_day=False):
+    """Дата или дата-время из параметра фильтра; None - если не разобрать."""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.datetime.combine(
+                day, datetime.time.max if end_of_day else datetime.time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+def export_queryset(author=None, group=None, since=None, until=None):
+    posts = Post.objects.order_by()
+    if author:
+        posts = posts.filter(author__username=author)
+    if group:
+        posts = posts.filter(group__slug=group)
+    since = parse_moment(since)
+    until = parse_moment(until, end_of_day=True)
+    if since is not None:
+        posts = posts.filter(pub_date__gte=since)
+    if until is not None:
+        posts = posts.filter(pub_date__lte=until)
+    return posts.values_list(*EXPORT_FIELDS)
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Обходит queryset пачками по id, не держа в памяти больше пачки."""
+    if chunk_size < 1:
+        raise ValueError('chunk_size должен быть больше нуля')
+    last_id = 0
+    while True:
+        chunk = queryset.filter(id__gt=last_id).order_by('id')[:chunk_size]
+        count = 0
+        for row in chunk.iterator(chunk_size=chunk_size):
+            count += 1
+            last_id = row[0]
+            yield row
+        if count < chunk_size:
+            return
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def render_rows(rows, export_format):
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(HEADER)
+        for row in rows:
+            yield writer.writerow(
+                row[:2] + (row[2].isoformat(),) + row[3:])
+        return
+    for row in rows:
+        record = dict(zip(HEADER, row))
+        record['pub_date'] = record['pub_date'].isoformat()
+        yield json.dumps(record, ensure_ascii=False) + '\n'
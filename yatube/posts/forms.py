@@ -5,8 +5,9 @@ from .models import Post
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group')
-        labels = {'text': 'Введите текст', 'group': 'Выберите группу'}
+        fields = ('text', 'group', 'image')
+        labels = {'text': 'Введите текст', 'group': 'Выберите группу',
+                  'image': 'Картинка'}
 
     def clean_text(self):
         text = self.cleaned_data['text']
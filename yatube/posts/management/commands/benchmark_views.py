@@ -0,0 +1,88 @@
+import json
+import platform
+import random
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Заполняет отдельную тестовую базу данными и замеряет p50/p95 '
+            'и число запросов views posts и API; результат пишет в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=benchmark.SIZES,
+                            default='small', help='объём данных')
+        parser.add_argument('--posts', type=int)
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--groups', type=int)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--views', nargs='+', choices=benchmark.VIEWS,
+                            default=benchmark.VIEWS)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='JSON прошлого прогона для сравнения')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='допустимый рост p95, доля (0.2 = 20%%)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='не удалять тестовую базу и данные')
+
+    def handle(self, *args, **options):
+        volume = dict(benchmark.SIZES[options['size']])
+        for name in volume:
+            if options[name] is not None:
+                volume[name] = options[name]
+        rng = random.Random(options['seed'])
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if not benchmark.Post.objects.exists():
+                self.stdout.write(f'Заполняем базу: {volume}')
+                benchmark.seed(rng=rng, stdout=self.stdout, **volume)
+            results = benchmark.run(rng, options['iterations'],
+                                    options['views'])
+        finally:
+            if not options['keepdb']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'volume': volume,
+                'iterations': options['iterations'],
+                'seed': options['seed'],
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        for view, numbers in results.items():
+            self.stdout.write(
+                f'{view:12} p50={numbers["p50_ms"]:8.2f} мс  '
+                f'p95={numbers["p95_ms"]:8.2f} мс  '
+                f'rps={numbers["rps"]:8.1f}  '
+                f'запросов={numbers["queries"]}')
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                baseline = json.load(source)['results']
+            regressions = benchmark.compare(
+                results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Group, Post, User
+from posts.views import RECORD
+from users.utils import CursorPaginator
+
+
+class Command(BaseCommand):
+    help = 'Печатает EXPLAIN запросов лент, чтобы проверить работу индексов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', help='slug группы для group_posts')
+        parser.add_argument('--author', help='username автора для profile')
+
+    def handle(self, *args, **options):
+        groups = Group.objects.all()
+        authors = User.objects.all()
+        if options['group']:
+            groups = groups.filter(slug=options['group'])
+        if options['author']:
+            authors = authors.filter(username=options['author'])
+        group, author = groups.first(), authors.first()
+
+        feeds = {'index': Post.objects.feed()}
+        if group is not None:
+            feeds['group_posts'] = group.group_list.feed()
+        if author is not None:
+            feeds['profile'] = author.get_posts.feed()
+        for name, queryset in feeds.items():
+            self.explain(f'{name}: номер страницы', queryset[:RECORD])
+            paginator = CursorPaginator(queryset, RECORD)
+            page = paginator.get_cursor_page()
+            if page.has_next():
+                self.explain(
+                    f'{name}: курсор',
+                    paginator.cursor_queryset(
+                        after=page.next_cursor)[:RECORD + 1],
+                )
+
+    def explain(self, title, queryset):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(str(queryset.query))
+        self.stdout.write(queryset.explain())
+        self.stdout.write('')
@@ -0,0 +1,45 @@
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand
+
+from posts import export
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError('должно быть больше нуля')
+    return number
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты в JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=export.FORMATS,
+                            default='jsonl')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--since', help='с даты (ISO 8601)')
+        parser.add_argument('--until', help='по дату (ISO 8601)')
+        parser.add_argument('--chunk-size', type=positive_int,
+                            default=export.CHUNK_SIZE)
+        parser.add_argument('--output', '-o', default='-',
+                            help='файл для выгрузки, "-" - stdout')
+
+    def handle(self, *args, **options):
+        posts = export.export_queryset(
+            author=options['author'],
+            group=options['group'],
+            since=options['since'],
+            until=options['until'],
+        )
+        lines = export.render_rows(
+            export.iter_rows(posts, options['chunk_size']), options['format'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
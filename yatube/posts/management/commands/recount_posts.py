@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.directory import purge_group_directory
+from posts.models import AuthorStats, Follow, Group, Post
+
+BATCH_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов авторов и групп по таблице Post '
+            'и счётчики подписчиков по таблице Follow.')
+
+    def handle(self, *args, **options):
+        group_counts = Post.objects.filter(group=OuterRef('pk')).order_by(
+        ).values('group').annotate(total=Count('pk')).values('total')
+        author_counts = Post.objects.order_by().values_list(
+            'author').annotate(total=Count('pk'))
+        follower_counts = Follow.objects.order_by().values_list(
+            'author').annotate(total=Count('pk'))
+        with transaction.atomic():
+            groups = Group.objects.update(
+                posts_count=Coalesce(Subquery(group_counts), 0))
+            stats = {
+                author_id: AuthorStats(author_id=author_id, posts_count=total)
+                for author_id, total in author_counts.iterator()
+            }
+            for author_id, total in follower_counts.iterator():
+                stats.setdefault(
+                    author_id, AuthorStats(author_id=author_id)
+                ).followers_count = total
+            AuthorStats.objects.all().delete()
+            authors = AuthorStats.objects.bulk_create(
+                stats.values(), batch_size=BATCH_SIZE)
+            purge_group_directory()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: групп - {groups}, авторов - {len(authors)}'))
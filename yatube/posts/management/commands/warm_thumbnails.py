@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def warm(post_id):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id).first()
+    if post is None or not post.image:
+        return False
+    return thumbnails.make_thumbnails(post)
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие миниатюры картинок существующих постов '
+            'в нескольких процессах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=20,
+                            help='сколько постов отдавать процессу за раз')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('--processes должен быть больше нуля')
+        post_ids = Post.objects.exclude(image='').order_by(
+            'pk').values_list('pk', flat=True)
+        if options['processes'] == 1:
+            results = map(warm, post_ids.iterator())
+            created = self.report(results)
+        else:
+            # Дочерние процессы получают копию соединения с БД при fork:
+            # закрываем его, чтобы каждый процесс открыл своё.
+            post_ids = list(post_ids)
+            connections.close_all()
+            with multiprocessing.Pool(options['processes']) as pool:
+                created = self.report(pool.imap_unordered(
+                    warm, post_ids, chunksize=options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: создано миниатюр для {created} постов'))
+
+    def report(self, results):
+        created = checked = 0
+        for result in results:
+            checked += 1
+            created += result
+            if checked % 1000 == 0:
+                self.stdout.write(
+                    f'Проверено постов: {checked}, создано: {created}')
+        return created
@@ -1,4 +1,7 @@
-from django.db import models
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -17,14 +20,57 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Group description'
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Posts count'
+    )
 
     def __str__(self):
         return self.title
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ]
+
+
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, update_counters=True, **kwargs):
+        """bulk_create не шлёт сигналы, поэтому счётчики сдвигаются здесь.
+
+        С ignore_conflicts неизвестно, какие строки вставлены, а при
+        update_counters=False счётчики не трогаются вовсе: после такой
+        вставки их чинит команда recount_posts.
+        """
+        from .signals import shift_post_counters
+
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if update_counters and not kwargs.get('ignore_conflicts'):
+                deltas = Counter((obj.author_id, obj.group_id) for obj in objs)
+                for (author_id, group_id), delta in deltas.items():
+                    shift_post_counters(author_id, group_id, delta)
+        return objs
+
+    def feed(self):
+        """Записи для лент: автор и группа одним JOIN, без лишних колонок."""
+        return self.select_related('author', 'group').defer(
+            'author__password',
+            'author__last_login',
+            'author__is_superuser',
+            'author__email',
+            'author__is_staff',
+            'author__is_active',
+            'author__date_joined',
+            'group__description',
+        )
+
 
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -38,9 +84,161 @@ class Post(models.Model):
         verbose_name='Group',
         related_name='group_list'
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        help_text='Растёт при каждом изменении, входит в ключ кэша карточки.'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:SHORT_WORD]
 
+    def save(self, *args, **kwargs):
+        # Счётчики постов обновляются сигналами в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-modified'],
+                         name='post_author_modified_idx'),
+            models.Index(fields=['group', '-modified'],
+                         name='post_group_modified_idx'),
+        ]
+
+
+@contextmanager
+def preserve_post_dates():
+    """Отключает auto_now_add/auto_now у Post, чтобы записать свои даты.
+
+    Нужно при импорте архивов и заполнении тестовых данных.
+    """
+    pub_date = Post._meta.get_field('pub_date')
+    modified = Post._meta.get_field('modified')
+    pub_date.auto_now_add, modified.auto_now = False, False
+    try:
+        yield
+    finally:
+        pub_date.auto_now_add, modified.auto_now = True, True
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики постов и подписчиков автора."""
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='post_stats'
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+    @staticmethod
+    def count_for(author):
+        """Счётчик из select_related('post_stats') без запроса к Post."""
+        try:
+            return author.post_stats.posts_count
+        except AuthorStats.DoesNotExist:
+            return 0
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько строк источника уже импортировано командой import_posts."""
+    name = models.CharField(max_length=255, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name}: {self.position}'
+
+
+class FeedChange(models.Model):
+    """Время последнего удаления поста или группы, одна строка.
+
+    Удаление не оставляет строки с новым Post.modified, поэтому
+    валидаторы лент (posts.conditional) учитывают и это время.
+    """
+    SINGLETON: int = 1
+
+    changed = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.changed}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following'
+    )
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя.
+
+    pub_date копируется из поста, чтобы лента читалась одним проходом
+    по индексу (user, -pub_date, -post) без JOIN для сортировки.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user}: {self.post_id}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
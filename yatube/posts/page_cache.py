@@ -0,0 +1,71 @@
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.encoding import iri_to_uri
+from django.utils.http import urlencode
+
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def _generation_key(path):
+    return f'feed:generation:{path}'
+
+
+def _generation(path):
+    """Текущее поколение страниц пути; сброс поколения - это очистка."""
+    key = _generation_key(path)
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid4().hex
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def _page_key(request):
+    params = urlencode(sorted(
+        (name, request.GET[name]) for name in PAGE_PARAMS
+        if name in request.GET
+    ))
+    path = iri_to_uri(request.path)
+    return f'feed:page:{path}:{_generation(path)}:{params}'
+
+
+def cache_feed_page(view):
+    """Кэширует ленту целиком для анонимных GET-запросов.
+
+    Включается настройкой FEED_PAGE_CACHE_TIMEOUT. Записи ключей никогда
+    не перебираются: purge_feed_pages сбрасывает поколение пути, и все его
+    страницы разом становятся недостижимы. Поэтому годится любой бэкенд
+    кэша, в том числе локальная память и файлы.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        timeout = settings.FEED_PAGE_CACHE_TIMEOUT
+        if (not timeout or request.method != 'GET'
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        key = _page_key(request)
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response, timeout)
+        return response
+    return wrapper
+
+
+def purge_feed_pages(author=None, group_slugs=(), usernames=()):
+    """Сбрасывает кэш главной, страниц групп и профилей авторов."""
+    usernames = list(usernames)
+    if author is not None:
+        usernames.append(author.username)
+    paths = [reverse('posts:index')]
+    paths += [reverse('posts:group_posts', kwargs={'slug': slug})
+              for slug in group_slugs]
+    paths += [reverse('posts:profile', kwargs={'username': username})
+              for username in usernames]
+    cache.delete_many([_generation_key(path) for path in paths])
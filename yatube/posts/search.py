@@ -0,0 +1,173 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite индекс - виртуальная таблица FTS5 над posts_post, которую держат
+в актуальном состоянии триггеры. На PostgreSQL - GIN-индекс по выражению
+to_tsvector(). На остальных СУБД поиск деградирует до LIKE.
+"""
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from users.utils import CURSOR_SEPARATOR, CursorPage, CursorPaginator
+from .models import Post
+
+SEARCH_CONFIG = 'russian'
+POST_TABLE = Post._meta.db_table
+FTS_TABLE = f'{POST_TABLE}_fts'
+GIN_INDEX = f'{POST_TABLE}_text_search_idx'
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': (
+        f'AFTER INSERT ON {POST_TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+        f'END'
+    ),
+    f'{FTS_TABLE}_ad': (
+        f'AFTER DELETE ON {POST_TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+        f"VALUES ('delete', old.id, old.text); "
+        f'END'
+    ),
+    f'{FTS_TABLE}_au': (
+        f'AFTER UPDATE OF text ON {POST_TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+        f"VALUES ('delete', old.id, old.text); "
+        f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+        f'END'
+    ),
+}
+TSVECTOR = f"to_tsvector('{SEARCH_CONFIG}', {POST_TABLE}.text)"
+TSQUERY = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+
+
+def ensure_search_index(using=connection):
+    """Создаёт поисковый индекс, если его нет.
+
+    SQLite пересоздаёт таблицу при многих миграциях posts_post и теряет
+    при этом триггеры, поэтому функция вызывается и после каждого migrate.
+    """
+    with using.cursor() as cursor:
+        if using.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {GIN_INDEX} '
+                f'ON {POST_TABLE} USING GIN ({TSVECTOR})'
+            )
+        if using.vendor != 'sqlite':
+            return
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            f"text, content='{POST_TABLE}', content_rowid='id')"
+        )
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            f"AND tbl_name = '{POST_TABLE}'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = set(FTS_TRIGGERS) - existing
+        for name in missing:
+            cursor.execute(f'CREATE TRIGGER {name} {FTS_TRIGGERS[name]}')
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(using=connection):
+    with using.cursor() as cursor:
+        if using.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+        if using.vendor == 'sqlite':
+            for name in FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fts_match(query):
+    """Превращает ввод пользователя в запрос FTS5: все слова, как фразы."""
+    return ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in query.split())
+
+
+def _ranked_sql(query):
+    """SELECT id, rank найденных постов; чем меньше rank, тем выше пост."""
+    if connection.vendor == 'sqlite':
+        return (f'SELECT rowid AS id, rank FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s', [fts_match(query)])
+    if connection.vendor == 'postgresql':
+        return (f'SELECT id, -ts_rank({TSVECTOR}, {TSQUERY}) AS rank '
+                f'FROM {POST_TABLE} WHERE {TSVECTOR} @@ {TSQUERY}',
+                [query, query])
+    return (f'SELECT id, 0 AS rank FROM {POST_TABLE} WHERE text LIKE %s',
+            [f'%{query}%'])
+
+
+def match_queryset(queryset, query):
+    """Фильтрует queryset постов по поисковому индексу, без ранжирования."""
+    if connection.vendor == 'sqlite':
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [fts_match(query)]))
+    if connection.vendor == 'postgresql':
+        return queryset.extra(where=[f'{TSVECTOR} @@ {TSQUERY}'],
+                              params=[query])
+    return queryset.filter(text__icontains=query)
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная навигация по выдаче, упорядоченной по (rank, id)."""
+
+    def __init__(self, query, per_page):
+        super().__init__(Post.objects.feed(), per_page)
+        self.query = query
+
+    @staticmethod
+    def encode_cursor(obj):
+        value = f'{obj.rank!r}{CURSOR_SEPARATOR}{obj.pk}'
+        return urlsafe_base64_encode(force_bytes(value))
+
+    @staticmethod
+    def decode_cursor(token):
+        if not token:
+            return None
+        try:
+            rank, pk = force_str(
+                urlsafe_base64_decode(token)).split(CURSOR_SEPARATOR)
+            return float(rank), int(pk)
+        except (TypeError, ValueError):
+            return None
+
+    def ranked_ids(self, after=None, before=None, limit=None):
+        sql, params = _ranked_sql(self.query)
+        where, order = '', 'rank, id DESC'
+        if after is not None:
+            where = 'WHERE rank > %s OR (rank = %s AND id < %s)'
+            params += [after[0], after[0], after[1]]
+        elif before is not None:
+            where = 'WHERE rank < %s OR (rank = %s AND id > %s)'
+            params += [before[0], before[0], before[1]]
+            order = 'rank DESC, id'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, rank FROM ({sql}) ranked {where} '
+                f'ORDER BY {order} LIMIT %s', params + [limit])
+            return cursor.fetchall()
+
+    def get_cursor_page(self, after=None, before=None):
+        after, before = self.decode_cursor(after), self.decode_cursor(before)
+        if not self.query.strip():
+            return CursorPage([], self, has_next=False, has_previous=False)
+        ranked = self.ranked_ids(after, before, self.per_page + 1)
+        has_more = len(ranked) > self.per_page
+        ranked = ranked[:self.per_page]
+        if before is not None:
+            ranked.reverse()
+        posts = self.object_list.in_bulk([pk for pk, rank in ranked])
+        rows = []
+        for pk, rank in ranked:
+            if pk in posts:
+                posts[pk].rank = rank
+                rows.append(posts[pk])
+        if before is not None:
+            return CursorPage(rows, self, has_next=True,
+                              has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more,
+                          has_previous=after is not None)
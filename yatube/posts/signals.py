@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.jobs import enqueue
+from . import tasks, timeline
+from .conditional import touch_feeds
+from .directory import purge_group_directory
+from .models import AuthorStats, Follow, Group, Post
+from .page_cache import purge_feed_pages
+
+
+def _shift(queryset, delta):
+    # Счётчик не уходит в минус, даже если разошёлся с таблицей Post:
+    # такой дрейф чинит команда recount_posts.
+    if delta < 0:
+        queryset = queryset.filter(posts_count__gte=-delta)
+    return queryset.update(posts_count=F('posts_count') + delta)
+
+
+def shift_group_counter(group_id, delta):
+    """Сдвигает счётчик постов группы; каталог групп устаревает."""
+    _shift(Group.objects.filter(pk=group_id), delta)
+    purge_group_directory()
+
+
+def shift_post_counters(author_id, group_id, delta):
+    """Сдвигает счётчики постов автора и группы на delta."""
+    updated = _shift(AuthorStats.objects.filter(author_id=author_id), delta)
+    if not updated and delta > 0:
+        _, created = AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults={'posts_count': delta})
+        if not created:
+            # Строку успел создать параллельный запрос: сдвигаем её.
+            _shift(AuthorStats.objects.filter(author_id=author_id), delta)
+    if group_id is not None:
+        shift_group_counter(group_id, delta)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, raw, **kwargs):
+    """Запоминает группу и картинку поста до сохранения, поднимает версию.
+
+    Версия поднимается в самом UPDATE выражением F, а не в экземпляре:
+    две правки, даже параллельные и с одной устаревшей копии, получат
+    разные версии. Новое значение перечитывает refresh_version.
+    """
+    instance._previous_group_id = None
+    instance._previous_image = None
+    if instance.pk is None or raw:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image').first()
+    if previous is not None:
+        instance._previous_group_id, instance._previous_image = previous
+        instance.version = F('version') + 1
+
+
+@receiver(post_save, sender=Post)
+def refresh_version(sender, instance, raw, **kwargs):
+    # После UPDATE в экземпляре осталось выражение, а не число.
+    if not isinstance(instance.version, int):
+        instance.refresh_from_db(fields=['version'])
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        shift_post_counters(instance.author_id, instance.group_id, 1)
+        return
+    previous_group_id = instance._previous_group_id
+    if previous_group_id != instance.group_id:
+        if previous_group_id is not None:
+            shift_group_counter(previous_group_id, -1)
+        if instance.group_id is not None:
+            shift_group_counter(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    shift_post_counters(instance.author_id, instance.group_id, -1)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Group)
+def touch_feeds_on_delete(sender, instance, **kwargs):
+    # Удаление не оставляет строки с новым Post.modified, по которому
+    # conditional_page заметил бы изменение.
+    touch_feeds()
+
+
+def _purge_feeds_of(post, group_ids):
+    if not settings.FEED_PAGE_CACHE_TIMEOUT:
+        return
+    group_ids = {group_id for group_id in group_ids if group_id is not None}
+    slugs = list(Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)) if group_ids else []
+    # Кэш сбрасывается здесь, а не в воркере: у локального кэша каждого
+    # процесса он свой. После коммита - чтобы параллельный запрос не
+    # положил в кэш страницу, собранную по ещё не изменённым данным.
+    usernames = [post.author.username]
+    transaction.on_commit(lambda: purge_feed_pages(
+        usernames=usernames, group_slugs=slugs))
+
+
+@receiver(post_save, sender=Post)
+def purge_feeds_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    _purge_feeds_of(instance, {instance.group_id,
+                               getattr(instance, '_previous_group_id', None)})
+
+
+@receiver(post_delete, sender=Post)
+def purge_feeds_on_delete(sender, instance, **kwargs):
+    _purge_feeds_of(instance, {instance.group_id})
+
+
+@receiver(post_save, sender=Post)
+def fan_out_on_create(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        enqueue(tasks.fan_out_post, key=f'fan_out_post:{instance.pk}',
+                post_id=instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_directory_on_group_change(sender, instance, **kwargs):
+    purge_group_directory()
+
+
+@receiver(post_save, sender=Follow)
+def fill_timeline_on_follow(sender, instance, created, raw, **kwargs):
+    if not created or raw:
+        return
+    timeline.shift_followers(instance.author_id, 1)
+    timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline.shift_followers(instance.author_id, -1)
+    timeline.unfollow_cleanup(instance.user, instance.author)
+
+
+@receiver(post_save, sender=Post)
+def make_thumbnails_on_save(sender, instance, raw, **kwargs):
+    if raw or not instance.image:
+        return
+    if instance.image.name != getattr(instance, '_previous_image', None):
+        enqueue(tasks.make_thumbnails,
+                key=f'make_thumbnails:{instance.pk}:{instance.image.name}',
+                post_id=instance.pk)
@@ -0,0 +1,30 @@
+"""Отложенные задачи, которые порождает запись постов."""
+from core.jobs import task
+
+from . import thumbnails, timeline
+from .models import Post
+
+
+@task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'author_id', 'pub_date').first()
+    # Пост могли удалить, пока задача ждала в очереди.
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task
+def fan_out_posts(post_ids):
+    """fan_out_post для пачки постов, созданных одним запросом."""
+    for post in Post.objects.filter(pk__in=post_ids).only(
+            'pk', 'author_id', 'pub_date').order_by('pk'):
+        timeline.fan_out(post)
+
+
+@task
+def make_thumbnails(post_id):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id).exclude(image='').first()
+    if post is not None:
+        thumbnails.make_thumbnails(post)
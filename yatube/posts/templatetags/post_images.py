@@ -0,0 +1,18 @@
+from django import template
+
+from posts.thumbnails import cached_thumbnail, prime_thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """Готовая миниатюра картинки поста или None, если её ещё нет."""
+    return cached_thumbnail(post.image, size)
+
+
+@register.simple_tag
+def prime_post_thumbnails(posts, size):
+    """Готовит миниатюры всех постов страницы одним запросом к базе."""
+    prime_thumbnails(posts, size)
+    return ''
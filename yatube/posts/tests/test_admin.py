@@ -0,0 +1,117 @@
+import datetime
+from unittest import mock
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User, preserve_post_dates
+from posts.templatetags.post_admin import period_bounds
+from users.utils import EstimatedCountPaginator, estimate_table_count
+
+
+def aware(*args):
+    return timezone.make_aware(datetime.datetime(*args))
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        dates = [aware(2019, 12, 31, 23), aware(2020, 2, 10),
+                 aware(2020, 2, 29), aware(2020, 7, 1)]
+        with preserve_post_dates():
+            Post.objects.bulk_create([
+                Post(text=f'Пост {number}', author=cls.admin,
+                     group=cls.group, pub_date=date, modified=date)
+                for number, date in enumerate(dates)
+            ])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries]
+
+    def test_period_bounds(self):
+        self.assertEqual(period_bounds(2020),
+                         (aware(2020, 1, 1), aware(2021, 1, 1)))
+        self.assertEqual(period_bounds(2020, 12),
+                         (aware(2020, 12, 1), aware(2021, 1, 1)))
+        self.assertEqual(period_bounds(2020, 2, 29),
+                         (aware(2020, 2, 29), aware(2020, 3, 1)))
+
+    def test_date_hierarchy_filters_by_range(self):
+        response, queries = self.changelist(
+            pub_date__year=2020, pub_date__month=2)
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        content = response.content.decode()
+        self.assertIn('pub_date__day=29', content)
+        self.assertNotIn('pub_date__day=28', content)
+        for sql in queries:
+            self.assertNotIn('DISTINCT', sql)
+            self.assertNotIn('django_datetime_extract', sql)
+
+    def test_date_hierarchy_lists_only_years_with_posts(self):
+        response, _ = self.changelist()
+        content = response.content.decode()
+        self.assertIn('pub_date__year=2019', content)
+        self.assertIn('pub_date__year=2020', content)
+        response, _ = self.changelist(pub_date__year=2020)
+        content = response.content.decode()
+        self.assertIn('pub_date__month=2', content)
+        self.assertIn('pub_date__month=7', content)
+        self.assertNotIn('pub_date__month=3', content)
+
+    def test_bad_date_redirects_with_error(self):
+        response = self.client.get(self.url, {'pub_date__year': 'x'})
+        self.assertRedirects(response, f'{self.url}?e=1',
+                             fetch_redirect_response=False)
+
+    def test_related_fields_use_autocomplete(self):
+        response, _ = self.changelist()
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Описание')
+        response = self.client.get(reverse(
+            'admin:posts_post_change', args=[Post.objects.first().pk]))
+        self.assertContains(response, 'class="admin-autocomplete"', count=2)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.changelist()
+        _, before = self.changelist()
+        date = aware(2020, 7, 2)
+        with preserve_post_dates():
+            Post.objects.bulk_create([
+                Post(text=f'Ещё {number}', author=self.admin,
+                     group=self.group, pub_date=date, modified=date)
+                for number in range(20)
+            ])
+        _, after = self.changelist()
+        self.assertEqual(len(after), len(before))
+
+    def test_count_is_bounded(self):
+        queryset = Post.objects.all()
+        with mock.patch('users.utils.COUNT_LIMIT', 2):
+            with mock.patch('users.utils.estimate_table_count',
+                            return_value=1000) as estimate:
+                self.assertEqual(
+                    EstimatedCountPaginator(queryset, 1).count, 1000)
+                self.assertEqual(EstimatedCountPaginator(
+                    queryset.filter(group=self.group), 1).count, 2)
+            estimate.assert_called_once()
+        self.assertEqual(EstimatedCountPaginator(queryset, 1).count, 4)
+
+    def test_estimate_is_exact_for_small_tables(self):
+        Post.objects.exclude(pk=Post.objects.latest('pk').pk).delete()
+        self.assertEqual(estimate_table_count(Post, 'default'), 1)
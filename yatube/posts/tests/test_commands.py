@@ -0,0 +1,192 @@
+import datetime
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import benchmark
+from posts.models import AuthorStats, Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+        cls.group = Group.objects.create(
+            title='test-группа',
+            slug='test-slug',
+            description='test-описание группы'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def import_posts(self, *args):
+        out = StringIO()
+        call_command('import_posts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_jsonl_in_batches(self):
+        rows = [{'text': f'Пост {i}', 'author': 'wtf', 'group': 'test-slug',
+                 'pub_date': f'2020-01-{i + 1:02d}T10:00:00+00:00'}
+                for i in range(5)]
+        rows.append({'text': 'Без автора', 'author': 'nobody'})
+        path = self.write('archive.jsonl', '\n'.join(
+            json.dumps(row, ensure_ascii=False) for row in rows) + '\nbad\n')
+        out = self.import_posts(path, '--batch-size', '2')
+        self.assertIn('строк/с', out)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Post.objects.earliest('pub_date').pub_date.day, 1)
+        self.assertEqual(AuthorStats.objects.get(author=self.user)
+                         .posts_count, 5)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+        self.assertGreater(Post.objects.earliest('modified').modified,
+                           timezone.now() - datetime.timedelta(minutes=1))
+
+    def test_same_name_different_file_is_imported_again(self):
+        path = self.write('archive.jsonl', json.dumps(
+            {'text': 'Первый архив', 'author': 'wtf'}))
+        self.import_posts(path)
+        path = self.write('archive.jsonl', json.dumps(
+            {'text': 'Второй архив, длиннее', 'author': 'wtf'}))
+        self.import_posts(path)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_stdin_needs_name_and_starts_over_each_time(self):
+        with self.assertRaisesMessage(CommandError, '--name'):
+            self.import_posts('-')
+        for text in ('Первый', 'Второй'):
+            with mock.patch('sys.stdin', StringIO(json.dumps(
+                    {'text': text, 'author': 'wtf'}))):
+                self.import_posts('-', '--name', 'daily')
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(FEED_PAGE_CACHE_TIMEOUT=60)
+    def test_import_purges_feed_pages(self):
+        path = self.write('archive.jsonl', json.dumps(
+            {'text': 'Пост', 'author': 'wtf', 'group': 'test-slug'}))
+        with mock.patch('posts.management.commands.import_posts.'
+                        'purge_feed_pages') as purge:
+            self.import_posts(path)
+        purge.assert_called_once_with(usernames=['wtf'],
+                                      group_slugs=['test-slug'])
+
+    def test_import_csv_creates_missing_authors_and_groups(self):
+        path = self.write('archive.csv', 'text,author,group\n'
+                                         'Первый,new_author,new-group\n'
+                                         'Второй,wtf,\n')
+        self.import_posts(path, '--create-authors', '--create-groups')
+        self.assertTrue(Post.objects.filter(
+            author__username='new_author', group__slug='new-group').exists())
+        self.assertTrue(Post.objects.filter(text='Второй',
+                                            group=None).exists())
+
+    def test_resume_after_failure_skips_imported_rows(self):
+        path = self.write('archive.jsonl', '\n'.join(
+            json.dumps({'text': f'Пост {i}', 'author': 'wtf'})
+            for i in range(6)))
+        original = Post.objects.bulk_create
+        calls = []
+
+        def fail_on_second_batch(posts, *args, **kwargs):
+            calls.append(posts)
+            if len(calls) == 2:
+                raise RuntimeError('обрыв соединения')
+            return original(posts, *args, **kwargs)
+
+        with mock.patch.object(Post.objects, 'bulk_create',
+                               side_effect=fail_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_posts(path, '--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 2)
+        out = self.import_posts(path, '--batch-size', '2')
+        self.assertIn('со строки 2', out)
+        self.assertEqual(sorted(Post.objects.values_list('text', flat=True)),
+                         [f'Пост {i}' for i in range(6)])
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='test-группа',
+            slug='test-slug',
+            description='test-описание группы'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(5)
+        )
+        Post.objects.create(text='Чужой пост', author=cls.other)
+
+    def test_command_walks_table_in_chunks(self):
+        out = StringIO()
+        call_command('export_posts', '--author', 'wtf', '--chunk-size', '2',
+                     stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['text'] for row in rows],
+                         [f'Пост {i}' for i in range(5)])
+        self.assertEqual(rows[0]['group'], 'test-slug')
+
+    def test_chunk_size_must_be_positive(self):
+        for size in ('0', '-1'):
+            with self.subTest(size=size):
+                with self.assertRaisesMessage(CommandError, '--chunk-size'):
+                    call_command('export_posts', '--chunk-size', size,
+                                 stdout=StringIO())
+
+    def test_view_streams_filtered_csv(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:export_posts'), {
+            'format': 'csv', 'group': 'test-slug', 'since': '2000-01-01',
+            'until': timezone.now().date().isoformat(),
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,text,pub_date,author,group')
+        self.assertEqual(len(lines), 6)
+        response = self.client.get(reverse('posts:export_posts'),
+                                   {'until': '2000-01-01'})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+
+class BenchmarkTest(TestCase):
+    @override_settings(RATE_LIMITS={'posts:post_create': {
+        'scope': 'user', 'burst': 1, 'per_minute': 1}})
+    def test_seed_run_and_compare(self):
+        rng = random.Random(1)
+        benchmark.seed(posts=30, users=3, groups=2, rng=rng)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(sum(AuthorStats.objects.values_list(
+            'posts_count', flat=True)), 30)
+        results = benchmark.run(rng, iterations=2)
+        self.assertEqual(set(results), set(benchmark.VIEWS))
+        self.assertLessEqual(results['index']['p50_ms'],
+                             results['index']['p95_ms'])
+        self.assertEqual(benchmark.compare(results, results, 0.2), [])
+        slower = {view: dict(numbers, p95_ms=numbers['p95_ms'] / 2,
+                             queries=numbers['queries'] - 1)
+                  for view, numbers in results.items()}
+        self.assertEqual(len(benchmark.compare(results, slower, 0.2)),
+                         2 * len(benchmark.VIEWS))
@@ -0,0 +1,77 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import directory
+from posts.models import Group, Post, User, preserve_post_dates
+
+
+class GroupDirectoryTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.author = User.objects.create_user(username='author')
+        self.alpha = Group.objects.create(
+            title='Альфа', slug='alpha', description='Первая группа')
+        self.beta = Group.objects.create(
+            title='Бета', slug='beta', description='Вторая группа')
+        self.published = timezone.now() - datetime.timedelta(days=3)
+        with preserve_post_dates():
+            Post.objects.create(text='Пост', author=self.author,
+                                group=self.beta, pub_date=self.published,
+                                modified=self.published)
+        self.url = reverse('posts:group_index')
+
+    def rows(self):
+        return list(self.client.get(self.url).context['page_obj'])
+
+    def test_lists_groups_with_counts_and_last_activity(self):
+        rows = self.rows()
+        self.assertEqual([row['slug'] for row in rows], ['alpha', 'beta'])
+        self.assertEqual((rows[0]['posts_count'], rows[0]['last_activity']),
+                         (0, None))
+        self.assertEqual((rows[1]['posts_count'], rows[1]['last_activity']),
+                         (1, self.published))
+
+    def test_page_is_cached(self):
+        self.rows()
+        with self.assertNumQueries(0):
+            self.rows()
+
+    def test_cache_is_purged_when_posts_change_group(self):
+        self.rows()
+        post = Post.objects.create(text='Новый', author=self.author,
+                                   group=self.alpha)
+        self.assertEqual(self.rows()[0]['posts_count'], 1)
+        post.group = self.beta
+        post.save()
+        rows = self.rows()
+        self.assertEqual([row['posts_count'] for row in rows], [0, 2])
+        self.assertEqual(rows[1]['last_activity'], post.pub_date)
+        post.delete()
+        self.assertEqual(self.rows()[1]['posts_count'], 1)
+
+    def test_cache_is_purged_when_groups_change(self):
+        self.rows()
+        Group.objects.create(title='Гамма', slug='gamma', description='')
+        self.assertEqual(len(self.rows()), 3)
+        self.alpha.delete()
+        self.assertEqual(len(self.rows()), 2)
+
+    def test_pages(self):
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number:03}', slug=f'group-{number}',
+                  description='')
+            for number in range(directory.GROUPS_PER_PAGE))
+        response = self.client.get(self.url, {'page': 2})
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count,
+                         directory.GROUPS_PER_PAGE + 2)
+        self.assertEqual(len(page), 2)
+        self.assertContains(response, '?page=1')
+        self.assertEqual(
+            self.client.get(self.url, {'page': 'x'}).context[
+                'page_obj'].number, 1)
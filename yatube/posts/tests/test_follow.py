@@ -0,0 +1,110 @@
+from unittest import mock
+
+from core.jobs import run_pending
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import AuthorStats, Follow, Post, TimelineEntry, User
+
+
+class FollowTimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        Post.objects.create(text='Старый пост автора', author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self, author):
+        return self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+
+    def feed(self, **params):
+        response = self.reader_client.get(
+            reverse('posts:follow_index'), params)
+        return response.context['page_obj']
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        self.follow(self.author)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).followers_count, 1)
+        self.assertEqual(self.reader.timeline.count(), 1)
+        post = Post.objects.create(text='Новый пост автора',
+                                   author=self.author)
+        Post.objects.create(text='Чужой пост', author=self.other)
+        self.assertFalse(post.timeline_entries.exists())
+        run_pending()
+        self.assertEqual(self.feed()[0], post)
+        self.assertEqual(len(self.feed()), 2)
+
+    def test_unfollow_clears_timeline(self):
+        self.follow(self.author)
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).followers_count, 0)
+
+    def test_followers_row_created_concurrently_still_gets_delta(self):
+        AuthorStats.objects.filter(author=self.other).delete()
+        get_or_create = AuthorStats.objects.get_or_create
+
+        def racing_get_or_create(**kwargs):
+            AuthorStats.objects.create(author=self.other, followers_count=2)
+            return get_or_create(**kwargs)
+
+        with mock.patch.object(AuthorStats.objects, 'get_or_create',
+                               side_effect=racing_get_or_create):
+            timeline.shift_followers(self.other.pk, 1)
+        self.assertEqual(AuthorStats.objects.get(
+            author=self.other).followers_count, 3)
+
+    def test_cannot_follow_self(self):
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_timeline_is_cursor_paginated_and_trimmed(self):
+        self.follow(self.author)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author) for i in range(15))
+        for post in Post.objects.filter(author=self.author):
+            timeline.fan_out(post)
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        first = self.feed()
+        self.assertEqual(list(first), expected[:10])
+        second = self.feed(after=first.next_cursor)
+        self.assertEqual(list(second), expected[10:])
+        self.assertFalse(second.has_next())
+
+        with mock.patch.object(timeline, 'TIMELINE_LENGTH', 5), \
+                mock.patch.object(timeline, 'TIMELINE_SLACK', 2):
+            timeline.trim_timelines([self.reader.pk])
+        self.assertEqual(list(self.feed()), expected[:5])
+
+    def test_popular_authors_are_merged_on_read(self):
+        self.follow(self.author)
+        self.follow(self.other)
+        AuthorStats.objects.filter(author=self.other).update(
+            followers_count=timeline.FANOUT_LIMIT + 1)
+        popular = Post.objects.create(text='Пост популярного автора',
+                                      author=self.other)
+        post = Post.objects.create(text='Новый пост автора',
+                                   author=self.author)
+        run_pending()
+        self.assertFalse(popular.timeline_entries.exists())
+        self.assertEqual(list(self.feed()), [post, popular] + list(
+            Post.objects.filter(text='Старый пост автора')))
+
+    def test_recount_keeps_followers(self):
+        self.follow(self.author)
+        call_command('recount_posts', stdout=mock.Mock())
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual((stats.posts_count, stats.followers_count), (1, 1))
@@ -1,7 +1,13 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import AuthorStats, Group, Post
+from ..signals import shift_post_counters
 
 User = get_user_model()
 
@@ -30,3 +36,101 @@ class PostModelTest(TestCase):
         for key, value in post_group.items():
             with self.subTest(key=key):
                 self.assertEqual(value, str(key))
+
+
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(12)
+        )
+
+    def test_explain_feeds_uses_feed_indexes(self):
+        """Запросы лент профиля и группы идут по составным индексам."""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        plans = out.getvalue()
+        self.assertIn('profile: курсор', plans)
+        if connection.vendor != 'sqlite':
+            return
+        cursor_plans = {
+            name: plans.split(f'{name}: курсор')[1].split('\n\n')[0]
+            for name in ('index', 'group_posts', 'profile')
+        }
+        self.assertIn('SEARCH posts_post USING INDEX post_pub_date_idx '
+                      '(pub_date<?)', cursor_plans['index'])
+        self.assertIn('SEARCH posts_post USING INDEX post_group_pub_date_idx '
+                      '(group_id=? AND pub_date<?)',
+                      cursor_plans['group_posts'])
+        self.assertIn('SEARCH posts_post USING INDEX post_author_pub_date_idx '
+                      '(author_id=? AND pub_date<?)', cursor_plans['profile'])
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_new = Group.objects.create(
+            title='Новая группа',
+            slug='new-slug',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, author, group, group_new):
+        self.group.refresh_from_db()
+        self.group_new.refresh_from_db()
+        self.assertEqual(AuthorStats.objects.get(
+            author=self.user).posts_count, author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.group_new.posts_count, group_new)
+
+    def test_counters_follow_create_regroup_and_delete(self):
+        post = Post.objects.create(author=self.user, group=self.group,
+                                   text='Тестовый пост')
+        Post.objects.bulk_create([
+            Post(author=self.user, group=self.group_new, text='Пост 2'),
+            Post(author=self.user, text='Пост 3'),
+        ])
+        self.assertCounters(3, 1, 1)
+        post.group = self.group_new
+        post.save()
+        self.assertCounters(3, 0, 2)
+        post.delete()
+        self.assertCounters(2, 0, 1)
+        Post.objects.all().delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_recount_posts_repairs_drift(self):
+        Post.objects.create(author=self.user, group=self.group, text='Пост')
+        AuthorStats.objects.update(posts_count=7)
+        Group.objects.update(posts_count=5)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounters(1, 1, 0)
+
+    def test_row_created_concurrently_still_gets_delta(self):
+        get_or_create = AuthorStats.objects.get_or_create
+
+        def racing_get_or_create(**kwargs):
+            # Параллельный запрос создаёт строку между UPDATE и INSERT.
+            AuthorStats.objects.create(author=self.user, posts_count=4)
+            return get_or_create(**kwargs)
+
+        with mock.patch.object(AuthorStats.objects, 'get_or_create',
+                               side_effect=racing_get_or_create):
+            shift_post_counters(self.user.pk, None, 1)
+        self.assertEqual(AuthorStats.objects.get(
+            author=self.user).posts_count, 5)
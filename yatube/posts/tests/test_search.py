@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='admin')
+        Post.objects.bulk_create(
+            Post(text=f'Котики и собаки, пост {i}', author=cls.user)
+            for i in range(12)
+        )
+        cls.best = Post.objects.create(
+            text='Котики, котики, котики', author=cls.user)
+        Post.objects.create(text='Совсем про другое', author=cls.user)
+
+    def search(self, **params):
+        response = self.client.get(reverse('posts:search'), params)
+        return response.context['page_obj']
+
+    def test_search_is_ranked_and_keyset_paginated(self):
+        """Выдача ранжирована, курсоры обходят её без пропусков."""
+        first = self.search(q='котики')
+        self.assertEqual(len(first), 10)
+        self.assertEqual(first[0], self.best)
+        second = self.search(q='котики', after=first.next_cursor)
+        self.assertEqual(len(second), 3)
+        self.assertFalse(second.has_next())
+        found = {post.pk for post in list(first) + list(second)}
+        self.assertEqual(found, set(Post.objects.exclude(
+            text='Совсем про другое').values_list('pk', flat=True)))
+        back = self.search(q='котики', before=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.get(pk=self.best.pk)
+        post.text = 'Теперь про ежей'
+        post.save()
+        self.assertEqual(list(self.search(q='ежей')), [post])
+        post.delete()
+        self.assertEqual(len(self.search(q='ежей')), 0)
+
+    def test_empty_and_odd_queries(self):
+        self.assertEqual(len(self.search(q='')), 0)
+        self.assertEqual(len(self.search(q='" OR NEAR(')), 0)
+
+    def test_admin_search_uses_index(self):
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(reverse('admin:posts_post_changelist'),
+                              {'q': 'другое'})
+        self.assertEqual(response.context['cl'].result_count, 1)
@@ -0,0 +1,102 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from core.jobs import run_pending
+from core.models import Job
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, name='small.gif'):
+        return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+    def test_thumbnails_are_made_off_the_request(self):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой', 'image': self.upload()})
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.startswith('posts/small'))
+        self.assertTrue(Job.objects.filter(
+            name='posts.tasks.make_thumbnails').exists())
+        self.assertIsNone(thumbnails.cached_thumbnail(post.image, 'feed'))
+        self.assertNotContains(self.client.get(reverse('posts:index')),
+                               '<img class="card-img')
+
+        run_pending()
+        feed = thumbnails.cached_thumbnail(post.image, 'feed')
+        self.assertEqual((feed.width, feed.height), (960, 339))
+        self.assertEqual(Post.objects.get().version, post.version + 1)
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            feed.url)
+        detail = thumbnails.cached_thumbnail(post.image, 'detail')
+        self.assertContains(self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk})), detail.url)
+
+    def test_edit_without_new_image_enqueues_nothing(self):
+        post = Post.objects.create(text='Текст', author=self.user,
+                                   image=self.upload())
+        run_pending()
+        Job.objects.all().delete()
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': 'Новый текст'})
+        self.assertFalse(Job.objects.filter(
+            name='posts.tasks.make_thumbnails').exists())
+
+    def test_warm_thumbnails_command(self):
+        post = Post.objects.create(text='Текст', author=self.user)
+        post.image.save('warm.gif', self.upload('warm.gif'), save=False)
+        Post.objects.filter(pk=post.pk).update(image=post.image.name)
+        out = StringIO()
+        call_command('warm_thumbnails', processes=1, stdout=out)
+        self.assertIn('создано миниатюр для 1 постов', out.getvalue())
+        self.assertIsNotNone(thumbnails.cached_thumbnail(post.image, 'feed'))
+        call_command('warm_thumbnails', processes=1, stdout=out)
+        self.assertIn('создано миниатюр для 0 постов', out.getvalue())
+
+    def test_feed_looks_up_thumbnails_in_one_query(self):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.user,
+                 image=f'posts/missing_{number}.gif')
+            for number in range(5)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        lookups = [query for query in queries
+                   if 'thumbnail_kvstore' in query['sql']]
+        self.assertEqual(len(lookups), 1)
@@ -19,25 +19,28 @@ class PostURLTest(TestCase):
             slug='test-slug',
             description='test-описание группы'
         )
-        Post.objects.create(
+        cls.post = Post.objects.create(
             text='Тестовый текст',
             author=cls.user,
             group=cls.group,
         )
+        # id поста не захардкожен: при параллельном запуске и в общем
+        # прогоне с tests/ база уже видела другие посты.
+        post_url = f'/posts/{cls.post.pk}/'
         cls.url_public = [
             '/',
             '/group/test-slug/',
-            '/posts/1/',
+            post_url,
             '/profile/wtf/',
         ]
         cls.url_private = [
-            '/posts/1/edit'
+            f'{post_url}edit'
         ]
 
         cls.url_authorized_client = [
             '/',
             '/group/test-slug/',
-            '/posts/1/',
+            post_url,
             '/profile/wtf/',
             '/create/',
         ]
@@ -81,8 +84,8 @@ class PostURLTest(TestCase):
             'posts/index.html': '/',
             'posts/group_list.html': '/group/test-slug/',
             'posts/profile.html': '/profile/wtf/',
-            'posts/post_edit.html': '/posts/1/edit/',
-            'posts/post_detail.html': '/posts/1/',
+            'posts/post_edit.html': f'/posts/{self.post.pk}/edit/',
+            'posts/post_detail.html': f'/posts/{self.post.pk}/',
             'posts/create_post.html': '/create/',
         }
         for template, address in templates_url_names.items():
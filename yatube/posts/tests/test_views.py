@@ -1,9 +1,21 @@
 
+import datetime
+import os
+import tempfile
+from http import HTTPStatus
+
+from core.middleware import QueryBudgetExceeded
+from django.core.cache import cache
+from django.db import connection
 from django.shortcuts import get_object_or_404
-from django.test import Client, TestCase
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
-from posts.models import Group, Post, User
+from posts.batch import save_posts
+from posts.models import FeedChange, Group, Post, User
 
 
 class TestView(TestCase):
@@ -169,3 +181,388 @@ class PaginatorViewsTest(TestCase):
             args=[get_object_or_404(User,
                                     username='wtf')]) + '?page=2')
         self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+        cls.group = Group.objects.create(
+            title='test-группа',
+            slug='test-slug',
+            description='test-описание группы'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {i}', group=cls.group, author=cls.user)
+            for i in range(13)
+        )
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсоры ?after= и ?before= обходят ленту без пропусков."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'wtf'}),
+        )
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        for url in urls:
+            with self.subTest(url=url), self.settings(
+                    PAGINATION_MODE='cursor'):
+                first = self.client.get(url).context['page_obj']
+                self.assertEqual(list(first), expected[:10])
+                self.assertFalse(first.has_previous())
+                self.assertTrue(first.has_next())
+                second = self.client.get(
+                    url, {'after': first.next_cursor}).context['page_obj']
+                self.assertEqual(list(second), expected[10:])
+                self.assertFalse(second.has_next())
+                back = self.client.get(
+                    url, {'before': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), expected[:10])
+                self.assertFalse(back.has_previous())
+
+    def test_cursor_page_runs_no_count_query(self):
+        """Курсорная страница не считает записи и не использует OFFSET."""
+        with self.settings(PAGINATION_MODE='cursor'):
+            first = self.client.get(reverse('posts:index'))
+        cursor = first.context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'), {'after': cursor})
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.client.get(reverse('posts:index'), {'after': '!!'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='wtf', first_name='Имя', last_name='Фамилия')
+        cls.group = Group.objects.create(
+            title='test-группа',
+            slug='test-slug',
+            description='test-описание группы'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {i}', group=cls.group, author=cls.user)
+            for i in range(13)
+        )
+
+    def test_feed_pages_run_fixed_number_of_queries(self):
+        """Число запросов к БД на странице ленты не зависит от числа постов."""
+        pages = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_posts', kwargs={'slug': 'test-slug'}): 4,
+            reverse('posts:profile', kwargs={'username': 'wtf'}): 4,
+        }
+        for url, queries in pages.items():
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                self.client.get(url)
+
+    def test_post_detail_joins_author_and_group(self):
+        post = Post.objects.first()
+        with self.assertNumQueries(2):
+            self.client.get(reverse('posts:post_detail',
+                                    kwargs={'post_id': post.pk}))
+
+
+class PostFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+        cls.post = Post.objects.create(text='Старый текст', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_edit_bumps_version_and_invalidates_fragment(self):
+        """Правка поста меняет ключ фрагмента, устаревший не отдаётся."""
+        self.client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Мимо сигналов')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Старый текст')
+
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Новый текст'},
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).version, 2)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Старый текст')
+
+    def test_author_and_group_changes_invalidate_fragment(self):
+        """Имя автора и группа поста входят в ключ фрагмента."""
+        group = Group.objects.create(title='Группа', slug='old-slug')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        self.client.get(reverse('posts:index'))
+        User.objects.filter(pk=self.user.pk).update(first_name='Лев')
+        Group.objects.filter(pk=group.pk).update(slug='new-slug')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Лев')
+        self.assertContains(response, 'new-slug')
+        group.delete()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'new-slug')
+
+    def test_stale_instance_save_still_gets_new_version(self):
+        first = Post.objects.get(pk=self.post.pk)
+        second = Post.objects.get(pk=self.post.pk)
+        first.save()
+        second.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).version, 3)
+        self.assertEqual(second.version, 3)
+        save_posts(self.user, updated=[first])
+        self.assertEqual(first.version, 4)
+
+
+class FeedPageCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='wtf')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='test-группа',
+            slug='test-slug',
+            description='test-описание группы'
+        )
+        self.group_new = Group.objects.create(
+            title='Заголовок_новый',
+            slug='test_slug_new',
+            description='текстовоеполедлянаборатекста'
+        )
+        self.post = Post.objects.create(text='Первый пост', author=self.user,
+                                        group=self.group)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_posts',
+                             kwargs={'slug': 'test-slug'}),
+            'group_new': reverse('posts:group_posts',
+                                 kwargs={'slug': 'test_slug_new'}),
+            'profile': reverse('posts:profile', kwargs={'username': 'wtf'}),
+            'other': reverse('posts:profile', kwargs={'username': 'other'}),
+        }
+
+    def warm_up(self):
+        for url in self.urls.values():
+            self.client.get(url)
+
+    def is_cached(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.urls[name])
+        # Из кэша страница отдаётся после одного запроса валидатора ETag.
+        return len(queries) == 1
+
+    def test_cache_is_opt_in(self):
+        self.warm_up()
+        self.assertFalse(self.is_cached('index'))
+
+    @override_settings(FEED_PAGE_CACHE_TIMEOUT=60)
+    def test_anonymous_pages_are_cached_per_page(self):
+        self.warm_up()
+        for name in self.urls:
+            with self.subTest(name=name):
+                self.assertTrue(self.is_cached(name))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.urls['index'], {'page': 2})
+        self.assertTrue(queries)
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        response = authorized_client.get(self.urls['index'])
+        self.assertContains(response, 'Пользователь: wtf')
+
+    @override_settings(FEED_PAGE_CACHE_TIMEOUT=60)
+    def test_regroup_purges_only_affected_pages(self):
+        self.warm_up()
+        self.post.group = self.group_new
+        self.post.save()
+        self.assertFalse(self.is_cached('index'))
+        self.assertFalse(self.is_cached('group'))
+        self.assertFalse(self.is_cached('group_new'))
+        self.assertFalse(self.is_cached('profile'))
+        self.assertTrue(self.is_cached('other'))
+        response = self.client.get(self.urls['group_new'])
+        self.assertContains(response, 'Первый пост')
+
+    @override_settings(FEED_PAGE_CACHE_TIMEOUT=60, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_feed_cache'),
+    }})
+    def test_file_based_cache_is_purged_on_create(self):
+        cache.clear()
+        self.warm_up()
+        Post.objects.create(text='Второй пост', author=self.user)
+        self.assertTrue(self.is_cached('group'))
+        self.assertContains(self.client.get(self.urls['index']),
+                            'Второй пост')
+        cache.clear()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+        cls.group = Group.objects.create(
+            title='test-группа',
+            slug='test-slug',
+            description='test-описание группы'
+        )
+        cls.post = Post.objects.create(text='text-текст', author=cls.user,
+                                       group=cls.group)
+
+    def setUp(self):
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'wtf'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_unchanged_pages_answer_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_and_new_posts_change_validators(self):
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        Post.objects.create(text='Ещё пост', author=self.user)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        anonymous = self.client.get(self.urls[0])['ETag']
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        response = authorized_client.get(self.urls[0],
+                                         HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class ConditionalGetDeleteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='wtf')
+        self.group = Group.objects.create(
+            title='test-группа',
+            slug='test-slug',
+            description='test-описание группы'
+        )
+        self.post = Post.objects.create(text='text-текст', author=self.user,
+                                        group=self.group)
+        Post.objects.create(text='Второй', author=self.user)
+        # Last-Modified точен до секунды: всё, что было до удаления,
+        # отодвигаем в прошлое.
+        past = timezone.now() - datetime.timedelta(minutes=1)
+        Post.objects.update(modified=past)
+        FeedChange.objects.update_or_create(
+            pk=FeedChange.SINGLETON, defaults={'changed': past})
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'wtf'}),
+            reverse('api:posts'),
+        )
+
+    def assert_changed(self, validators):
+        for url, (etag, last_modified) in validators.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def validators(self):
+        validators = {}
+        for url in self.urls:
+            response = self.client.get(url)
+            validators[url] = response['ETag'], response['Last-Modified']
+        return validators
+
+    def test_post_delete_changes_validators(self):
+        validators = self.validators()
+        self.post.delete()
+        self.assert_changed(validators)
+
+    def test_group_delete_changes_validators(self):
+        validators = self.validators()
+        self.group.delete()
+        self.assert_changed(validators)
+
+    def test_validators_do_not_depend_on_cache(self):
+        validators = self.validators()
+        self.post.delete()
+        validators = self.validators()
+        cache.clear()
+        for url, (etag, _) in validators.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+
+class RequestMetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf')
+        cls.post = Post.objects.create(text='text-текст', author=cls.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn('tpl;dur=', timing)
+
+    def test_metrics_are_logged(self):
+        with self.assertLogs('yatube.performance', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('"view": "posts:index"', logs.output[0])
+        self.assertIn('"queries": 3', logs.output[0])
+
+    def test_budget_warns_and_fails_in_strict_mode(self):
+        budgets = {'posts:index': 1}
+        with self.settings(QUERY_BUDGETS=budgets,
+                           QUERY_BUDGET_STRICT=False), self.assertLogs(
+                'yatube.performance', 'WARNING'):
+            self.client.get(reverse('posts:index'))
+        with self.settings(QUERY_BUDGETS=budgets):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('posts:index'))
+
+    def test_posts_views_fit_their_budgets(self):
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'wtf'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                authorized_client.get(url)
+        authorized_client.post(reverse('posts:post_create'),
+                               {'text': 'Новый пост'})
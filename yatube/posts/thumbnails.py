@@ -0,0 +1,105 @@
+"""Миниатюры картинок постов фиксированных размеров.
+
+Миниатюры создаёт только фоновая задача (или команда warm_thumbnails).
+Шаблоны ищут готовую миниатюру в key-value хранилище sorl и ничего не
+создают сами: страница ленты никогда не декодирует картинки.
+"""
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDbKVStore)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .models import Post
+from .page_cache import purge_feed_pages
+
+SIZES = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('960', {}),
+}
+
+
+class Backend(ThumbnailBackend):
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры с тем же именем, что выбрал бы get_thumbnail.
+
+        Исходная картинка при этом не открывается.
+        """
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def cached(self, file_, geometry_string, **options):
+        """Готовая миниатюра из key-value хранилища или None.
+
+        При промахе картинка не открывается и не масштабируется.
+        """
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options))
+
+
+backend = Backend()
+
+
+def cached_thumbnail(image, size):
+    if not image:
+        return None
+    geometry, options = SIZES[size]
+    return backend.cached(image, geometry, **options)
+
+
+def prime_thumbnails(posts, size):
+    """Загружает записи о миниатюрах постов в кэш sorl одним запросом.
+
+    Хранилище cached_db ищет промахи кэша в базе по одному ключу, и на
+    холодном кэше каждая карточка с картинкой стоила бы запроса.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDbKVStore):
+        return
+    geometry, options = SIZES[size]
+    keys = [add_prefix(backend.thumbnail_file(
+        post.image, geometry, **options).key) for post in posts if post.image]
+    missing = set(keys) - set(kvstore.cache.get_many(keys))
+    if not missing:
+        return
+    values = dict(KVStoreModel.objects.filter(key__in=missing).values_list(
+        'key', 'value'))
+    kvstore.cache.set_many(
+        {key: values.get(key, EMPTY_VALUE) for key in missing},
+        thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+
+
+def make_thumbnails(post):
+    """Создаёт недостающие миниатюры поста; True - если что-то создано."""
+    missing = [size for size in SIZES
+               if cached_thumbnail(post.image, size) is None]
+    for size in missing:
+        geometry, options = SIZES[size]
+        backend.get_thumbnail(post.image, geometry, **options)
+    if not missing:
+        return False
+    # Карточка поста закэширована по версии, а страницы - по времени
+    # изменения: без сдвига обоих картинка не появится до их истечения.
+    Post.objects.filter(pk=post.pk).update(
+        version=F('version') + 1, modified=timezone.now())
+    if settings.FEED_PAGE_CACHE_TIMEOUT:
+        purge_feed_pages(
+            author=post.author,
+            group_slugs=[post.group.slug] if post.group else [])
+    return True
@@ -0,0 +1,133 @@
+"""Лента подписок: fan-out при записи и при чтении.
+
+Новый пост копируется в TimelineEntry каждого подписчика автора, и лента
+читается одним проходом по индексу (user, -pub_date, -post). У авторов,
+у которых подписчиков больше FANOUT_LIMIT, пост никуда не копируется:
+их посты подмешиваются в ленту при чтении прямо из Post.
+"""
+from django.db.models import F, OuterRef, Subquery
+
+from users.utils import CursorPage, CursorPaginator
+from .models import AuthorStats, Follow, Post, TimelineEntry, User
+
+TIMELINE_LENGTH: int = 500
+TIMELINE_SLACK: int = 50
+FANOUT_LIMIT: int = 1000
+
+
+def is_celebrity(author_id):
+    return AuthorStats.objects.filter(
+        author_id=author_id, followers_count__gt=FANOUT_LIMIT).exists()
+
+
+def trim_timelines(user_ids):
+    """Обрезает ленты, выросшие больше TIMELINE_LENGTH + TIMELINE_SLACK.
+
+    Запас нужен, чтобы не удалять по одной записи на каждый новый пост:
+    лента обрезается до TIMELINE_LENGTH раз в TIMELINE_SLACK постов.
+    """
+    entries = TimelineEntry.objects.filter(user=OuterRef('pk')).order_by(
+        '-pub_date', '-post_id').values('pub_date')
+    overflow = TIMELINE_LENGTH + TIMELINE_SLACK
+    users = User.objects.filter(pk__in=user_ids).annotate(
+        overflow=Subquery(entries[overflow:overflow + 1]),
+    ).filter(overflow__isnull=False).annotate(
+        cutoff=Subquery(entries[TIMELINE_LENGTH:TIMELINE_LENGTH + 1]),
+    ).values_list('pk', 'cutoff')
+    for user_id, cutoff in users:
+        TimelineEntry.objects.filter(
+            user_id=user_id, pub_date__lte=cutoff).delete()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = list(Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True))
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post.pk,
+                       pub_date=post.pub_date) for user_id in follower_ids),
+        ignore_conflicts=True,
+    )
+    trim_timelines(follower_ids)
+
+
+def backfill(user, author):
+    """Переносит в ленту нового подписчика последние посты автора."""
+    if is_celebrity(author.pk):
+        return
+    posts = author.get_posts.order_by('-pub_date', '-pk').values_list(
+        'pk', 'pub_date')[:TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user=user, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts),
+        ignore_conflicts=True,
+    )
+    trim_timelines([user.pk])
+
+
+def unfollow_cleanup(user, author):
+    TimelineEntry.objects.filter(
+        user=user,
+        post__in=Post.objects.filter(author=author).values('pk'),
+    ).delete()
+
+
+def shift_followers(author_id, delta):
+    """Сдвигает счётчик подписчиков автора на delta."""
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats = stats.filter(followers_count__gte=-delta)
+    if not stats.update(followers_count=F('followers_count') + delta) \
+            and delta > 0:
+        _, created = AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults={'followers_count': delta})
+        if not created:
+            # Строку успел создать параллельный запрос: сдвигаем её.
+            stats.update(followers_count=F('followers_count') + delta)
+
+
+class FollowPaginator(CursorPaginator):
+    """Курсорная навигация по ленте подписок.
+
+    Сливает две упорядоченные по (pub_date, id поста) выборки: записи
+    материализованной ленты и посты популярных авторов, прочитанные
+    напрямую из Post. Обычно вторая выборка пуста.
+    """
+
+    def __init__(self, user, per_page):
+        entries = TimelineEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group').order_by('-pub_date', '-post_id')
+        super().__init__(entries, per_page, key_field='post_id')
+        celebrities = Follow.objects.filter(
+            user=user, author__post_stats__followers_count__gt=FANOUT_LIMIT,
+        ).values('author_id')
+        self.celebrity_posts = CursorPaginator(
+            Post.objects.feed().filter(author__in=celebrities),
+            per_page,
+        )
+        self.has_celebrities = celebrities.exists()
+
+    def get_cursor_page(self, after=None, before=None):
+        limit = self.per_page + 1
+        rows = [entry.post for entry in
+                self.cursor_queryset(after, before)[:limit]]
+        if self.has_celebrities:
+            rows += list(self.celebrity_posts.cursor_queryset(
+                after, before)[:limit])
+            # Автор мог стать популярным, когда его посты уже лежали
+            # в ленте: такие посты придут из обеих выборок.
+            rows = list({post.pk: post for post in rows}.values())
+        backwards = self.decode_cursor(before) is not None
+        rows.sort(key=lambda post: (post.pub_date, post.pk),
+                  reverse=not backwards)
+        rows = rows[:limit]
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True,
+                              has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more,
+                          has_previous=self.decode_cursor(after) is not None)
@@ -1,15 +1,24 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Group, Post, User
+from .models import AuthorStats, Follow, Group, Post, User
 from django.contrib.auth.decorators import login_required
+from . import directory, export
+from .conditional import (conditional_page, group_state, index_state,
+                          post_state, profile_state)
 from .forms import PostForm
+from .page_cache import cache_feed_page
+from .search import SearchPaginator
+from .timeline import FollowPaginator
 from users.utils import paginate
 
 RECORD: int = 10
 NUMBER_30: int = 30
 
 
+@conditional_page(index_state)
+@cache_feed_page
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.feed()
     page_obj = paginate(request, post_list, RECORD)
     context = {
         'page_obj': page_obj,
@@ -17,9 +26,11 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(group_state)
+@cache_feed_page
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.group_list.all()
+    posts = group.group_list.feed()
     page_obj = paginate(request, posts, RECORD)
     context = {
         'group': group,
@@ -28,25 +39,82 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def group_index(request):
+    page_obj = directory.get_page(request.GET.get('page'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@conditional_page(profile_state)
+@cache_feed_page
 def profile(request, username):
     title = 'Профайл пользователя'
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    count_posts = posts.count()
+    author = get_object_or_404(
+        User.objects.select_related('post_stats'), username=username)
+    posts = author.get_posts.feed()
+    count_posts = AuthorStats.count_for(author)
     page_obj = paginate(request, posts, RECORD)
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author).exists()
     context = {
         'author': author,
         'count_posts': count_posts,
+        'following': following,
         'page_obj': page_obj,
         'title': title, }
     return render(request, 'posts/profile.html', context)
 
 
+@login_required
+def follow_index(request):
+    page_obj = FollowPaginator(request.user, RECORD).get_cursor_page(
+        request.GET.get('after'), request.GET.get('before'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        # delete() экземпляра, а не queryset: нужны сигналы, которые
+        # сдвигают счётчик подписчиков и чистят ленту.
+        follow.delete()
+    return redirect('posts:profile', username=username)
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    page_obj = SearchPaginator(query, RECORD).get_cursor_page(
+        request.GET.get('after'), request.GET.get('before'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_page(post_state)
 def post_detail(request, post_id):
     title = 'Пост'
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__post_stats'),
+        id=post_id)
     short_word = post.text[:NUMBER_30]
-    posts_count = Post.objects.filter(author=post.author).count()
+    posts_count = AuthorStats.count_for(post.author)
     context = {
         'short_word': short_word,
         'title': title,
@@ -59,7 +127,7 @@ def post_detail(request, post_id):
 @login_required
 def post_create(request):
     title = 'Добавить запись'
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST':
         if form.is_valid():
             new_form = form.save(commit=False)
@@ -79,7 +147,8 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
     if form.is_valid():
         post = form.save(commit=False)
         post.save()
@@ -90,3 +159,23 @@ def post_edit(request, post_id):
         'post': post,
     }
     return render(request, 'posts/post_edit.html', context)
+
+
+@login_required
+def export_posts(request):
+    export_format = request.GET.get('format', 'jsonl')
+    if export_format not in export.FORMATS:
+        export_format = 'jsonl'
+    posts = export.export_queryset(
+        author=request.GET.get('author'),
+        group=request.GET.get('group'),
+        since=request.GET.get('since'),
+        until=request.GET.get('until'),
+    )
+    response = StreamingHttpResponse(
+        export.render_rows(export.iter_rows(posts), export_format),
+        content_type=export.CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{export_format}"')
+    return response
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def user_version(user_id):
+    """Версия записи пользователя в кэше CACHES['default'].
+
+    Общая для всех процессов, если общий сам кэш (см. core.checks).
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def forget_user(user_id):
+    """Сбрасывает пользователя из кэша этого процесса и его версию."""
+    key = _version_key(user_id)
+    user_cache.delete(user_id)
+    cache.delete(key)
+    # Второй сброс после коммита: иначе другой процесс может успеть
+    # перечитать ещё старую строку и закэшировать её под новой версией.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class UserCache:
+    """Кэш строк пользователей в памяти процесса с TTL и вытеснением LRU.
+
+    Хранит значения полей и каждый раз собирает новый объект: view может
+    менять request.user, не задевая кэш. Запись годна, пока совпадает
+    её версия (user_version).
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+            model, db, values, item_version, expires = item
+            if item_version != version or expires < time.monotonic():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+        return model.from_db(
+            db, [field.attname for field in model._meta.concrete_fields],
+            values)
+
+    def set(self, user, version, timeout):
+        values = tuple(getattr(user, field.attname)
+                       for field in user._meta.concrete_fields)
+        with self._lock:
+            self._items[user.pk] = (type(user), user._state.db, values,
+                                    version, time.monotonic() + timeout)
+            self._items.move_to_end(user.pk)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+user_cache = UserCache(max_size=settings.AUTH_USER_CACHE_SIZE)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который не ходит в БД за пользователем на каждый запрос.
+
+    Запись живёт AUTH_USER_CACHE_TIMEOUT секунд. Выход и сохранение
+    пользователя (в том числе смена пароля или is_active) меняют его
+    версию в CACHES['default']; на запрос это стоит одного обращения к
+    кэшу вместо SQL. Другие процессы замечают новую версию, только если
+    этот кэш общий: профиль prod требует его (SHARED_CACHE_REQUIRED), а
+    с LocMemCache в нескольких процессах старая запись живёт до TTL.
+    """
+
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        if not timeout:
+            return super().get_user(user_id)
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return super().get_user(user_id)
+        version = user_version(user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(user, version, timeout)
+        return user
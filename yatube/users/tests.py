@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.backends import CachedModelBackend, user_cache, user_version
+
+User = get_user_model()
+
+
+class CachedAuthTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='wtf',
+                                            password='old-password')
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_steady_state_page_runs_no_auth_queries(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(2):
+            # Только валидатор ETag и выборка постов: ни сессии, ни
+            # пользователя.
+            response = self.authorized_client.get(url)
+        self.assertContains(response, 'Пользователь: wtf')
+
+    def test_signed_cookie_sessions(self):
+        url = reverse('posts:index')
+        with self.settings(SESSION_ENGINE=(
+                'django.contrib.sessions.backends.signed_cookies')):
+            client = Client()
+            client.force_login(self.user)
+            client.get(url)
+            with self.assertNumQueries(2):
+                response = client.get(url)
+        self.assertContains(response, 'Пользователь: wtf')
+
+    def test_password_change_logs_other_sessions_out(self):
+        url = reverse('posts:post_create')
+        self.assertEqual(self.authorized_client.get(url).status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        self.assertEqual(self.authorized_client.get(url).status_code, 302)
+
+    def test_logout_forgets_user(self):
+        self.authorized_client.get(reverse('posts:index'))
+        self.assertIsNotNone(user_cache.get(
+            self.user.pk, user_version(self.user.pk)))
+        self.authorized_client.get(reverse('users:logout'))
+        self.assertIsNone(user_cache.get(
+            self.user.pk, user_version(self.user.pk)))
+
+    def test_change_in_other_process_is_seen(self):
+        url = reverse('posts:post_create')
+        self.assertEqual(self.authorized_client.get(url).status_code, 200)
+        # Другой процесс меняет строку, и его сигнал сбрасывает только
+        # версию в общем кэше: локальная запись этого процесса остаётся.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.delete(f'auth:user:{self.user.pk}:version')
+        self.assertEqual(self.authorized_client.get(url).status_code, 302)
+
+    def test_cached_users_share_no_state(self):
+        backend = CachedModelBackend()
+        first = backend.get_user(self.user.pk)
+        first.username = 'changed'
+        second = backend.get_user(self.user.pk)
+        self.assertEqual(second.username, 'wtf')
+        self.assertIsNot(first._state, second._state)
+        self.assertFalse(second._state.adding)
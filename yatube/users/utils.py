@@ -1,8 +1,199 @@
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
 POSTS_PER_PAGE: int = 10
+COUNT_LIMIT: int = 10000
+EXACT_COUNT_LIMIT: int = 200000
+CURSOR_SEPARATOR: str = '|'
+
+
+def encode_key(pub_date, pk):
+    """Упаковывает ключ (pub_date, id) в непрозрачный токен."""
+    value = f'{pub_date.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return urlsafe_base64_encode(force_bytes(value))
+
+
+def encode_cursor(obj):
+    """Токен курсора для записи с полями pub_date и pk."""
+    return encode_key(obj.pub_date, obj.pk)
+
+
+def decode_cursor(token):
+    """Возвращает пару (pub_date, id) или None, если токен битый."""
+    if not token:
+        return None
+    try:
+        pub_date, pk = force_str(
+            urlsafe_base64_decode(token)).split(CURSOR_SEPARATOR)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPage(Page):
+    """Страница курсорной навигации, совместимая с page_obj в шаблонах."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Навигация по ключу (pub_date, id): без COUNT(*) и без OFFSET.
+
+    Каждая страница - это выборка по диапазону индекса с LIMIT, поэтому
+    время ответа не зависит от того, насколько далеко ушёл читатель.
+    """
+    encode_cursor = staticmethod(encode_cursor)
+    decode_cursor = staticmethod(decode_cursor)
+
+    def __init__(self, object_list, per_page, key_field='pk', **kwargs):
+        # key_field - поле, которое в курсоре стоит после pub_date и
+        # разрешает равенство дат; в выборке оно должно быть уникальным.
+        super().__init__(object_list, per_page, **kwargs)
+        self.key_field = key_field
+
+    def cursor_queryset(self, after=None, before=None):
+        """Выборка следующей страницы после курсора after или перед before.
+
+        Для before порядок обратный: ближайшие к курсору записи идут первыми.
+        """
+        after, before = self.decode_cursor(after), self.decode_cursor(before)
+        key = self.key_field
+        queryset = self.object_list
+        # Условие pub_date__gte/lte рядом с OR даёт планировщику диапазон
+        # индекса: по одному OR SQLite сканирует индекс с начала ленты.
+        if before is not None:
+            pub_date, pk = before
+            return queryset.filter(
+                Q(pub_date__gte=pub_date),
+                Q(pub_date__gt=pub_date)
+                | Q(pub_date=pub_date, **{f'{key}__gt': pk}),
+            ).order_by('pub_date', key)
+        queryset = queryset.order_by('-pub_date', f'-{key}')
+        if after is not None:
+            pub_date, pk = after
+            queryset = queryset.filter(
+                Q(pub_date__lte=pub_date),
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, **{f'{key}__lt': pk}),
+            )
+        return queryset
+
+    def get_cursor_page(self, after=None, before=None):
+        queryset = self.cursor_queryset(after, before)
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self.decode_cursor(before) is not None:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True,
+                              has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more,
+                          has_previous=self.decode_cursor(after) is not None)
+
+
+def _table_stat(connection, table):
+    """Число строк из статистики планировщика или None, если её нет."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class '
+                           'WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'sqlite':
+            # sqlite_stat1 появляется только после ANALYZE.
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                           "AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s '
+                           'LIMIT 1', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    rows = int(str(row[0]).split()[0])
+    return rows if rows > 0 else None
+
+
+def estimate_table_count(model, using):
+    """Примерное число строк таблицы без полного COUNT(*).
+
+    Оценка берётся из статистики планировщика (pg_class, sqlite_stat1),
+    а без неё - наибольший первичный ключ. После удалений MAX(pk)
+    завышает размер, поэтому небольшие таблицы, до EXACT_COUNT_LIMIT
+    строк по оценке, всё-таки считаются точно.
+    """
+    connection = connections[using]
+    manager = model._default_manager.using(using)
+    estimate = _table_stat(connection, model._meta.db_table)
+    if estimate is None:
+        estimate = manager.aggregate(last=Max('pk'))['last'] or 0
+    if estimate <= EXACT_COUNT_LIMIT:
+        return manager.count()
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не считает больше COUNT_LIMIT строк.
+
+    До предела число точное: COUNT по подзапросу с LIMIT. Дальше для
+    выборки без фильтров берётся оценка размера таблицы, а для
+    отфильтрованной - сам предел: глубже помогает сузить выборку фильтр
+    или навигация по датам.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        bounded = queryset.order_by()[:COUNT_LIMIT + 1].count()
+        if bounded <= COUNT_LIMIT:
+            return bounded
+        if not queryset.query.where:
+            return max(estimate_table_count(queryset.model, queryset.db),
+                       bounded)
+        return COUNT_LIMIT
 
 
 def paginate(request, object_list, post_per_page):
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before or settings.PAGINATION_MODE == 'cursor':
+        paginator = CursorPaginator(object_list, post_per_page)
+        return paginator.get_cursor_page(after, before)
     paginator = Paginator(object_list, post_per_page)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
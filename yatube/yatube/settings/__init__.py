@@ -0,0 +1,19 @@
+"""Настройки проекта: профиль выбирается переменной DJANGO_ENV.
+
+dev (по умолчанию), test или prod. DJANGO_SETTINGS_MODULE остаётся
+yatube.settings, а конкретный профиль можно указать и напрямую:
+yatube.settings.prod.
+"""
+import os
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif DJANGO_ENV == 'test':
+    from .test import *  # noqa: F401,F403
+elif DJANGO_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ValueError(f'Неизвестный профиль DJANGO_ENV={DJANGO_ENV!r}, '
+                     'ожидается dev, test или prod')
@@ -0,0 +1,322 @@
+"""
+Django settings for yatube project: общие для всех профилей.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+Профили dev, test и prod лежат рядом и выбираются в yatube.settings
+по переменной окружения DJANGO_ENV.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', '#3+x+@@g_@lcrl+oslqki&8y!_(b4yzs17c9tep4#pfud83cfh')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RateLimitMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES = [
+    {
+        # Обычный DjangoTemplates, который ещё и меряет время рендеринга
+        # для RequestMetricsMiddleware.
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
+        'NAME': 'django',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True, 'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ]
+        },
+    }
+]
+
+# Компилировать шаблоны из templates/ при старте (core.apps). Имеет смысл
+# только с cached.Loader, см. профиль prod.
+TEMPLATE_WARMUP = False
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        # Секунды жизни соединения между запросами; 0 - новое соединение
+        # на каждый запрос.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+    }
+}
+
+# Проверять постоянное соединение перед запросом и переоткрывать его,
+# если база его оборвала (core.db).
+DB_HEALTH_CHECKS = False
+
+# PRAGMA для каждого нового соединения с SQLite (core.db). WAL даёт
+# читать параллельно с записью, synchronous=NORMAL в WAL безопасен и
+# не ждёт fsync на каждом коммите, mmap убирает копирование страниц.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+    }
+}
+
+# Сбросы кэша, версии пользователей и общие лимиты частоты видны
+# другим процессам только через общий кэш (core.checks).
+# Для одного процесса dev-сервера и тестов хватает LocMemCache; при
+# True проект с ним не запустится.
+SHARED_CACHE_REQUIRED = False
+
+# Кэш целых страниц лент для анонимных GET-запросов, в секундах.
+# None - кэш выключен; записи сбрасываются при изменении постов.
+FEED_PAGE_CACHE_TIMEOUT = None
+
+# Сколько секунд хранить страницы каталога групп /groups/. Кэш
+# сбрасывается и сам, когда меняются группы или состав их постов.
+GROUP_DIRECTORY_CACHE_TIMEOUT = 60 * 60
+
+# Очередь отложенных задач core.jobs. Задачи выполняет manage.py
+# run_worker; при JOBS_EAGER они выполняются сразу после коммита в
+# процессе, поставившем задачу, и воркер не нужен.
+JOBS_EAGER = False
+# Через сколько секунд задача, зависшая в статусе running, считается
+# брошенной упавшим воркером и забирается снова.
+JOBS_TIMEOUT = 300
+# Сколько секунд хранить выполненные задачи; потом их удаляет run_worker.
+JOBS_DONE_TTL = 24 * 60 * 60
+
+# Бюджет SQL-запросов на view (по имени маршрута) для
+# core.middleware.RequestMetricsMiddleware. Превышение пишется в лог
+# yatube.performance, а при QUERY_BUDGET_STRICT роняет запрос - для тестов.
+QUERY_BUDGETS = {
+    'posts:index': 6,
+    'posts:group_posts': 7,
+    'posts:profile': 8,
+    'posts:group_index': 4,
+    'posts:follow_index': 6,
+    'posts:post_detail': 5,
+    'posts:search': 5,
+    'posts:post_create': 16,
+    'posts:post_edit': 12,
+    'api:posts': 2,
+    'api:post': 2,
+    'api:groups': 1,
+    'api:group': 1,
+    'api:group_posts': 3,
+    'api:profile': 1,
+    'api:profile_posts': 3,
+}
+QUERY_BUDGET_STRICT = False
+
+# Лимиты частоты POST-запросов по имени маршрута (core.ratelimit):
+# ведро на burst запросов, пополняется на per_minute в минуту. scope
+# 'user' - на пользователя, 'ip' - на адрес клиента.
+RATE_LIMITS = {
+    'users:login': {'scope': 'ip', 'burst': 10, 'per_minute': 10},
+    'users:signup': {'scope': 'ip', 'burst': 5, 'per_minute': 2},
+    'posts:post_create': {'scope': 'user', 'burst': 10, 'per_minute': 10},
+    'posts:post_edit': {'scope': 'user', 'burst': 20, 'per_minute': 20},
+    'api:posts_batch': {'scope': 'user', 'burst': 5, 'per_minute': 5},
+}
+# Ключ request.META с адресом клиента. За обратным прокси - заголовок,
+# который прокси выставляет сам, например HTTP_X_REAL_IP.
+RATE_LIMIT_IP_HEADER = 'REMOTE_ADDR'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # INFO - строка JSON с метриками на каждый запрос,
+        # WARNING - только превышения бюджета запросов.
+        'yatube.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+        },
+        # Отказы RateLimitMiddleware, строка JSON на каждый.
+        'yatube.ratelimit': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        # Повторы и окончательные падения задач run_worker.
+        'yatube.jobs': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Отдавать STATIC_ROOT из Django (core.views.serve_static) со сжатием и
+# заголовками кэширования, если перед приложением нет веб-сервера.
+SERVE_STATIC = False
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Миниатюры картинок постов. Их создаёт фоновая задача, а адреса готовых
+# миниатюр хранятся в key-value хранилище sorl: кэш поверх таблицы в БД.
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+THUMBNAIL_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+THUMBNAIL_PRESERVE_FORMAT = True
+
+# Ответы /api/v1/ не короче этого числа байт сжимаются gzip, если
+# клиент его принимает.
+API_GZIP_MIN_LENGTH = 1024
+# Сколько постов можно создать и изменить одним запросом
+# POST /api/v1/posts/batch/.
+API_BATCH_LIMIT = 100
+
+# Режим постраничной навигации лент: 'page' - номера страниц,
+# 'cursor' - ключевые курсоры ?after=/?before= без COUNT и OFFSET.
+PAGINATION_MODE = 'page'
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+# Хранилище сессий, выбирается переменной SESSION_MODE: cached_db читает
+# сессию из кэша и пишет в БД, signed_cookies хранит её в подписанной
+# cookie и не обращается ни к БД, ни к кэшу.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = os.environ.get('SESSION_MODE', 'cached_db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+
+# Пользователь из сессии берётся из кэша в памяти процесса
+# (users.backends) и сверяется с версией в CACHES['default']: сброс
+# виден другим процессам, только если этот кэш общий (см.
+# SHARED_CACHE_REQUIRED). 0 - кэш выключен.
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 60
+AUTH_USER_CACHE_SIZE = 10000
+
+
+#  подключаем движок filebased.EmailBackend
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# указываем директорию, в которую будут складываться файлы писем
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -0,0 +1,4 @@
+"""Профиль dev, используется по умолчанию."""
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
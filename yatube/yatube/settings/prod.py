@@ -0,0 +1,51 @@
+"""Профиль prod: DJANGO_ENV=prod."""
+import copy
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES['default']['CONN_MAX_AGE'] = int(
+    os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_HEALTH_CHECKS = True
+
+# Кэш общий для всех процессов и серверов. По умолчанию - таблица в той
+# же базе (manage.py createcachetable); memcached быстрее и увеличивает
+# счётчики лимитов атомарно: CACHE_BACKEND=
+# django.core.cache.backends.memcached.MemcachedCache, CACHE_LOCATION=
+# host:port. Кэш в памяти процесса не даст проекту запуститься.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'yatube_cache'),
+    }
+}
+SHARED_CACHE_REQUIRED = True
+
+# collectstatic добавляет в имена файлов хеш содержимого и кладёт рядом
+# сжатые .gz и .br копии.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+SERVE_STATIC = os.environ.get('DJANGO_SERVE_STATIC', '') == '1'
+
+# Шаблоны читаются с диска и компилируются один раз на процесс. При
+# явных loaders APP_DIRS должен быть выключен, app_directories.Loader
+# подключён вручную.
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Компилировать все шаблоны из templates/ при старте процесса, чтобы
+# первый запрос после деплоя не разбирал их с диска.
+TEMPLATE_WARMUP = True
@@ -0,0 +1,35 @@
+"""Профиль test: DJANGO_ENV=test или yatube.settings.test.
+
+manage.py test выбирает его сам, pytest - через pytest.ini.
+"""
+import os
+import tempfile
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+# Тестовая база целиком в памяти процесса: при параллельном запуске у
+# каждого процесса своя копия.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'CONN_MAX_AGE': 0,
+    }
+}
+
+# PBKDF2 намеренно медленный; в тестах пароли не защищают ничего.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Загруженные в тестах картинки и миниатюры не попадают в media/.
+MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'yatube_test_media')
+
+# Тесты шлют POST с одного адреса подряд; лимиты проверяются отдельно
+# через override_settings.
+RATE_LIMITS = {}
+
+# Превышение бюджета SQL-запросов (QUERY_BUDGETS) роняет тест.
+QUERY_BUDGET_STRICT = True